@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""Measures running provisioning commands one by one and as a batch
+
+Usage: ./benchmarks/bench_batch.py [places]
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from console import HBNBCommand  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+
+
+def script(console, places):
+    """Returns the lines creating and updating places Places"""
+    out = io.StringIO()
+    with redirect_stdout(out):
+        console.batch(["create Place"] * places)
+    return ['Place.update("{}", {{"name": "Place {}", "max_guest": 4}})'
+            .format(uid, i) for i, uid in enumerate(out.getvalue().split())]
+
+
+def run(batch, places):
+    """Returns the seconds the commands take, as a batch or not"""
+    fnd = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(fnd, "file.json")
+    FileStorage._FileStorage__objects = {}
+    console = HBNBCommand()
+    lines = script(console, places)
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        if batch:
+            console.batch(lines)
+        else:
+            for line in lines:
+                console.onecmd(line)
+    fnt = time.perf_counter() - start
+    shutil.rmtree(fnd)
+    return fnt
+
+
+def main(places):
+    """Prints the time of each way for the updates of places Places"""
+    print("places: {}".format(places))
+    for batch in (False, True):
+        fnt = run(batch, places)
+        print("{:>10}: {:8.2f} s {:8.0f} commands/s".format(
+            "batch" if batch else "one by one", fnt, places / fnt))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
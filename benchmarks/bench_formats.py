@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+"""Compares file size, save and reload time of the storage formats.
+
+Usage: ./benchmarks/bench_formats.py [total_objects]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.engine.serializers import serializers  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def main(total):
+    """Prints size, save and reload time per format for total Reviews"""
+    fnd = tempfile.mkdtemp()
+    FileStorage._FileStorage__objects = {}
+    for i in range(total):
+        obj = Review()
+        obj.place_id = "place-{}".format(i // 10)
+        obj.text = "Review number {}".format(i)
+    objects = FileStorage._FileStorage__objects
+    print("objects: {}".format(total))
+    print("{:>8} {:>10} {:>10} {:>10}".format(
+        "format", "size (MB)", "save (s)", "reload (s)"))
+    for name, fns in serializers.items():
+        fnp = os.path.join(fnd, "file" + fns.extensions[0])
+        FileStorage._FileStorage__file_path = fnp
+        FileStorage._FileStorage__objects = objects
+        FileStorage._FileStorage__fragments = {}
+        start = time.perf_counter()
+        storage.save()
+        save = time.perf_counter() - start
+        start = time.perf_counter()
+        storage.reload()
+        reload = time.perf_counter() - start
+        print("{:>8} {:>10.1f} {:>10.2f} {:>10.2f}".format(
+            name, os.path.getsize(fnp) / 1e6, save, reload))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""Measures importing Reviews from JSON Lines and CSV files and exporting
+them back, in records per second; the save that ends an import is timed
+on its own, by importing in a transaction
+
+Usage: ./benchmarks/bench_import.py [total_records]
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from console import HBNBCommand  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+
+
+def timed(console, command):
+    """Returns the seconds console takes to run command"""
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        console.onecmd(command)
+    return time.perf_counter() - start
+
+
+def main(total):
+    """Prints the throughput of import and export in each format"""
+    fnd = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(fnd, "file.json")
+    FileStorage._FileStorage__objects = {}
+    source = os.path.join(fnd, "source.jsonl")
+    with open(source, "w", encoding="utf-8") as fnf:
+        for i in range(total):
+            fnf.write('{{"place_id": "p{}", "user_id": "u{}", '
+                      '"text": "Review number {}"}}\n'.format(
+                          i % 1000, i % 5000, i))
+    console = HBNBCommand()
+    timed(console, "import Review " + source)
+    print("records: {}".format(total))
+    print("records/s")
+    print("format  export  import    save  import+save")
+    for fmt in ("jsonl", "csv"):
+        path = os.path.join(fnd, "reviews." + fmt)
+        fne = timed(console, "export Review " + path)
+        FileStorage._FileStorage__objects = {}
+        console.onecmd("begin")
+        fni = timed(console, "import Review " + path)
+        fns = timed(console, "commit")
+        print("{:>6}  {:6.0f}  {:6.0f}  {:6.0f}  {:11.0f}".format(
+            fmt, total / fne, total / fni, total / fns,
+            total / (fni + fns)))
+    shutil.rmtree(fnd)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""Measures what a read-only reader pays to show one object and count
+
+Usage: ./benchmarks/bench_mapped.py [total_objects]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def read(key):
+    """Reloads, shows the object at key and counts the objects"""
+    FileStorage._FileStorage__objects = {}
+    tracemalloc.start()
+    start = time.perf_counter()
+    storage.reload()
+    str(storage.all()[key])
+    storage.count()
+    fnt = time.perf_counter() - start
+    fnm = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return fnt, fnm
+
+
+def main(total):
+    """Prints the reader cost of each mode for total Reviews"""
+    fnd = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(fnd, "file.json")
+    FileStorage._FileStorage__objects = {}
+    for i in range(total):
+        fnr = Review()
+        fnr.text = "Review number {}".format(i)
+    key = "Review." + fnr.id
+    storage.save()
+    storage.snapshot()
+    print("objects: {}".format(total))
+    for mode in ("regular", "lazy", "mapped"):
+        FileStorage.lazy = mode == "lazy"
+        FileStorage.mapped = mode == "mapped"
+        fnt, fnm = read(key)
+        print("{:>8}: {:8.1f} ms {:8.0f} kB".format(
+            mode, fnt * 1000, fnm / 1e3))
+    shutil.rmtree(fnd)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
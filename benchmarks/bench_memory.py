@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""Measures the memory held per object after FileStorage.reload().
+
+Usage: ./benchmarks/bench_memory.py [total_objects]
+"""
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+
+
+def populate(total):
+    """Saves total Reviews and Places to a temporary file.json"""
+    fnd = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(fnd, "file.json")
+    FileStorage._FileStorage__objects = {}
+    classes = storage.classes()
+    for i in range(total):
+        if i % 4:
+            obj = classes["Review"]()
+            obj.place_id = "place-{}".format(i // 4)
+            obj.user_id = "user-{}".format(i % 97)
+            obj.text = "Review number {}".format(i)
+        else:
+            obj = classes["Place"]()
+            obj.city_id = "city-{}".format(i % 13)
+            obj.name = "Place number {}".format(i)
+            obj.price_by_night = i % 300
+    storage.save()
+
+
+def measure(total, compact):
+    """Returns the bytes held per object once reloaded"""
+    FileStorage.compact_models = compact
+    FileStorage._FileStorage__objects = {}
+    gc.collect()
+    tracemalloc.start()
+    storage.reload()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used / total
+
+
+def main(total):
+    """Prints bytes per object for the regular and compact models"""
+    populate(total)
+    print("objects: {}".format(total))
+    print("{:>10} {:>14}".format("mode", "bytes/object"))
+    for compact in (False, True):
+        print("{:>10} {:>14.0f}".format(
+            "compact" if compact else "regular", measure(total, compact)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""Measures the time the console takes to run each form of command, in a
+transaction so that nothing is written
+
+Usage: ./benchmarks/bench_parser.py [calls]
+"""
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from console import HBNBCommand  # noqa: E402
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+commands = ['show Place {id}',
+            'Place.show("{id}")',
+            'count Place',
+            'Place.count()',
+            'update Place {id} name "Loft"',
+            'Place.update("{id}", "name", "Loft")',
+            'Place.update("{id}", {{"name": "Loft", "max_guest": 4}})',
+            'Place.nothing("{id}")']
+
+
+def main(calls):
+    """Prints the microseconds each command takes"""
+    FileStorage._FileStorage__objects = {}
+    uid = Place().id
+    console = HBNBCommand()
+    storage.begin()
+    print("calls: {}".format(calls))
+    with open(os.devnull, "w") as fnf:
+        for command in commands:
+            line = command.format(id=uid)
+            with redirect_stdout(fnf):
+                start = time.perf_counter()
+                for i in range(calls):
+                    console.onecmd(line)
+                fnt = time.perf_counter() - start
+            print("{:>56}: {:6.2f} us".format(
+                command.format(id="<id>"), fnt / calls * 1e6))
+    storage.rollback()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""Measures the cost of classes(), attributes(), a console command and a
+reload, which looks the class of every record up in classes()
+
+Usage: ./benchmarks/bench_registry.py [calls] [total_objects]
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from console import HBNBCommand  # noqa: E402
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def per_call(function, calls):
+    """Returns the microseconds a call to function takes"""
+    start = time.perf_counter()
+    for i in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main(calls, total):
+    """Prints the cost of each operation"""
+    fnd = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(fnd, "file.json")
+    FileStorage._FileStorage__objects = {}
+    for i in range(total):
+        Place().name = "Place number {}".format(i)
+    fnp = Place()
+    storage.save()
+    console = HBNBCommand()
+    command = 'Place.update("{}", "number_rooms", 3)'.format(fnp.id)
+    print("calls: {}, objects: {}".format(calls, total))
+    print("classes(): {:.2f} us".format(per_call(storage.classes, calls)))
+    print("attributes(): {:.2f} us".format(
+        per_call(storage.attributes, calls)))
+    FileStorage.write_behind = True
+    with redirect_stdout(io.StringIO()):
+        print("console update: {:.2f} us".format(per_call(
+            lambda: console.onecmd(console.precmd(command)), calls)),
+            file=sys.stderr)
+    FileStorage.write_behind = False
+    FileStorage._FileStorage__objects = {}
+    start = time.perf_counter()
+    storage.reload()
+    fnt = time.perf_counter() - start
+    print("reload: {:.0f} objects/s".format((total + 1) / fnt))
+    shutil.rmtree(fnd)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 200000)
@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+"""Measures FileStorage.reload() throughput in objects per second.
+
+Usage: ./benchmarks/bench_reload.py [total_objects] [reload_workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def main(total, workers):
+    """Prints the reload throughput for total Reviews"""
+    fnd = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(fnd, "file.json")
+    FileStorage._FileStorage__objects = {}
+    for i in range(total):
+        Review().text = "Review number {}".format(i)
+    storage.save()
+    FileStorage._FileStorage__objects = {}
+    FileStorage.reload_workers = workers
+    start = time.perf_counter()
+    storage.reload()
+    fnt = time.perf_counter() - start
+    print("objects: {}, reload workers: {}".format(total, workers))
+    print("reload: {:.2f} s, {:.0f} objects/s".format(fnt, total / fnt))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 0)
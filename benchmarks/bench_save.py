@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""Measures FileStorage.save() latency against the number of dirty objects.
+
+Usage: ./benchmarks/bench_save.py [total_objects]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def timed(fn, repeat=5):
+    """Returns the best wall time of fn() in milliseconds"""
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        fnt = (time.perf_counter() - start) * 1000
+        best = fnt if best is None else min(best, fnt)
+    return best
+
+
+def main(total):
+    """Prints save latency for growing counts of dirty objects"""
+    fnd = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(fnd, "file.json")
+    FileStorage._FileStorage__objects = {}
+    objs = [Review() for i in range(total)]
+    for obj in objs:
+        obj.text = "A lovely stay, would come back"
+    storage.save()
+
+    def full():
+        FileStorage._FileStorage__fragments = {}
+        storage.save()
+
+    print("objects: {}".format(total))
+    print("{:>10} {:>12}".format("dirty", "save (ms)"))
+    print("{:>10} {:>12.1f}".format("all", timed(full)))
+    for dirty in (0, 1, 10, 100, 1000, 10000):
+        if dirty > total:
+            break
+
+        def partial():
+            for obj in objs[:dirty]:
+                obj.text = "Edited"
+            storage.save()
+        print("{:>10} {:>12.1f}".format(dirty, timed(partial)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""Measures saving a change to one Amenity next to many Reviews, and
+reloading, with a single file and with one file per class
+
+Usage: ./benchmarks/bench_shards.py [reviews] [saves]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import storage  # noqa: E402
+from models.amenity import Amenity  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.review import Review  # noqa: E402
+
+
+def run(sharded, total, saves):
+    """Returns the save and reload times in sharded mode or not"""
+    fnd = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(fnd, "file.json")
+    FileStorage._FileStorage__objects = {}
+    FileStorage.sharded = sharded
+    for i in range(total):
+        Review().text = "Review number {}".format(i)
+    fna = Amenity()
+    storage.save()
+    start = time.perf_counter()
+    for i in range(saves):
+        fna.name = "Amenity {}".format(i)
+        storage.save()
+    fns = (time.perf_counter() - start) / saves
+    FileStorage._FileStorage__objects = {}
+    start = time.perf_counter()
+    storage.reload()
+    fnr = time.perf_counter() - start
+    shutil.rmtree(fnd)
+    return fns, fnr
+
+
+def main(total, saves):
+    """Prints the save and reload times of each layout"""
+    print("reviews: {}, saves: {}".format(total, saves))
+    print(" layout  save (ms)  reload (s)")
+    for sharded in (False, True):
+        fns, fnr = run(sharded, total, saves)
+        print("{:>7}  {:9.2f}  {:10.2f}".format(
+            "sharded" if sharded else "single", fns * 1000, fnr))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""Measures save() throughput of threads updating objects concurrently
+
+Usage: ./benchmarks/bench_threads.py [objects] [saves_per_thread]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import storage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def run(threads, saves, objs):
+    """Returns the saves per second of threads updating objs"""
+    def work(n):
+        for i in range(saves):
+            fno = objs[(n * saves + i) % len(objs)]
+            fno.number_rooms = i
+            fno.save()
+    workers = [threading.Thread(target=work, args=(n,))
+               for n in range(threads)]
+    start = time.perf_counter()
+    for fnw in workers:
+        fnw.start()
+    for fnw in workers:
+        fnw.join()
+    storage.flush()
+    return threads * saves / (time.perf_counter() - start)
+
+
+def main(total, saves):
+    """Prints the throughput of each mode for 1 to 8 threads"""
+    fnd = tempfile.mkdtemp()
+    FileStorage._FileStorage__file_path = os.path.join(fnd, "file.json")
+    FileStorage._FileStorage__objects = {}
+    objs = [Place() for i in range(total)]
+    storage.save()
+    print("objects: {}, saves per thread: {}".format(total, saves))
+    print("threads  regular (saves/s)  threaded (saves/s)")
+    for threads in (1, 2, 4, 8):
+        results = []
+        for threaded in (False, True):
+            FileStorage.threaded = threaded
+            results.append(run(threads, saves, objs))
+        print("{:7d}  {:17.0f}  {:18.0f}".format(threads, *results))
+    shutil.rmtree(fnd)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 200)
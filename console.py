@@ -2,10 +2,34 @@
 """Module for the entry point of the command interpreter."""
 
 import cmd
+import io
+import sys
+from contextlib import redirect_stdout
 from models.base_model import BaseModel
 from models import storage
+from models.engine import bulk
+from models.engine.file_storage import ConflictError
 import re
 import json
+from datetime import datetime
+
+
+# Class.method(args): the id and the attribute are quoted, the value of
+# update() is a quoted string or a bare word, e.g.
+#     Place.update("1234", "name", "Loft")
+#     Place.update("1234", {"name": "Loft", "max_guest": 4})
+# Arguments not in that form end up in args only.
+DOTTED = re.compile(r"""
+    (?P<classname>\w*)\.(?P<method>\w+)\((?P<args>
+        "(?P<uid>[^")]*)"(?:,\ (?:
+            (?P<dict>\{[^)]*\})
+            |(?:"(?P<attribute>[^")]*)")?
+             (?:,\ (?P<value>"[^")]*"|[^\s)]+)?[^)]*)?
+            |[^)]*))?
+        |[^)]*)\)$""", re.VERBOSE)
+# update <class> <id> <attribute> <value>, separated by one whitespace
+UPDATE = re.compile(r'(\S+)(?:\s(\S+)(?:\s(\S+)(?:\s("[^"]*"|\S+))?)?)?')
+QUOTED = re.compile(r'".*"$')
 
 
 class HBNBCommand(cmd.Cmd):
@@ -14,42 +38,48 @@ class HBNBCommand(cmd.Cmd):
 
     prompt = "(hbnb) "
 
+    def onecmd(self, line):
+        """Runs a command, reporting objects another process changed
+        and writes to a read-only storage."""
+        try:
+            return super().onecmd(line)
+        except ConflictError as e:
+            print("** {} **".format(e))
+            return False
+        except io.UnsupportedOperation:
+            print("** storage is read-only **")
+            return False
+
     def default(self, line):
-        """Catch commands if nothing else matches then."""
-        # print("DEF:::", line)
-        self._precmd(line)
-
-    def _precmd(self, line):
-        """Intercepts commands to test for class.syntax()"""
-        # print("PRECMD:::", line)
-        match = re.search(r"^(\w*)\.(\w+)(?:\(([^)]*)\))$", line)
-        if not match:
-            return line
-        classname = match.group(1)
-        method = match.group(2)
-        args = match.group(3)
-        match_uid_and_args = re.search('^"([^"]*)"(?:, (.*))?$', args)
-        if match_uid_and_args:
-            uid = match_uid_and_args.group(1)
-            attr_or_dict = match_uid_and_args.group(2)
-        else:
+        """Runs Class.method(args) commands, parsed in a single match.
+
+        update, show and destroy go straight to their handlers; the
+        other commands get the class name and the id as their line.
+        Lines in no known syntax are reported, so a batch rolls back.
+        """
+        match = DOTTED.match(line)
+        if match is None:
+            print("** unknown syntax **")
+            return
+        classname, method, args, uid = match.group(
+            "classname", "method", "args", "uid")
+        if method in ("where", "update_where", "destroy_where"):
+            getattr(self, method)(classname, args)
+            return
+        if uid is None:
             uid = args
-            attr_or_dict = False
-
-        attr_and_value = ""
-        if method == "update" and attr_or_dict:
-            match_dict = re.search('^({.*})$', attr_or_dict)
-            if match_dict:
-                self.update_dict(classname, uid, match_dict.group(1))
-                return ""
-            match_attr_and_value = re.search(
-                '^(?:"([^"]*)")?(?:, (.*))?$', attr_or_dict)
-            if match_attr_and_value:
-                attr_and_value = (match_attr_and_value.group(
-                    1) or "") + " " + (match_attr_and_value.group(2) or "")
-        command = method + " " + classname + " " + uid + " " + attr_and_value
-        self.onecmd(command)
-        return command
+        if method == "update" and match.group("dict") is not None:
+            self.update_dict(classname, uid, match.group("dict"))
+        elif method == "update":
+            self.update(classname, uid or None, match.group("attribute"),
+                        match.group("value"))
+        elif method in ("show", "destroy"):
+            getattr(self, method)(classname, uid or None)
+        elif hasattr(self, "do_" + method):
+            getattr(self, "do_" + method)(
+                "{} {}".format(classname, uid).strip() if uid else classname)
+        else:
+            print("** unknown syntax **")
 
     def update_dict(self, classname, uid, s_dict):
         """Helper method for update() with a dictionary."""
@@ -73,15 +103,188 @@ class HBNBCommand(cmd.Cmd):
                     setattr(storage.all()[key], attribute, value)
                 storage.all()[key].save()
 
+    def where(self, classname, args):
+        """Helper method for where() with conditions and options."""
+        if not classname:
+            print("** class name missing **")
+        elif classname not in storage.classes():
+            print("** class doesn't exist **")
+        else:
+            try:
+                query = self.parse_where(classname, args)
+                if query is None:
+                    raise ValueError(args)
+                objs = storage.query(classname, **query)
+            except (TypeError, ValueError):
+                print("** invalid where clause **")
+                return
+            self.print_objects(objs)
+
+    def update_where(self, classname, args):
+        """Helper method for update_where() with conditions and a dict."""
+        if not classname:
+            print("** class name missing **")
+            return
+        elif classname not in storage.classes():
+            print("** class doesn't exist **")
+            return
+        match = re.search(r"^(.*?)(?:,\s*)?(\{.*\})\s*$", args)
+        if not match:
+            print("** attributes missing **")
+            return
+        try:
+            query = self.parse_where(classname, match.group(1))
+            if query is None or set(query) != {"where"}:
+                raise ValueError(args)
+        except (TypeError, ValueError):
+            print("** invalid where clause **")
+            return
+        try:
+            values = json.loads(match.group(2).replace("'", '"'))
+            count = storage.update_where(classname, query["where"], values)
+        except io.UnsupportedOperation:
+            raise  # a ValueError too, reported by onecmd()
+        except (AttributeError, TypeError, ValueError):
+            print("** invalid attributes **")
+            return
+        print(count)
+
+    def destroy_where(self, classname, args):
+        """Helper method for destroy_where() with conditions.
+
+        A last argument cascade also destroys the cities of destroyed
+        states, their places and the reviews of those, see
+        storage.cascades().
+        """
+        if not classname:
+            print("** class name missing **")
+            return
+        elif classname not in storage.classes():
+            print("** class doesn't exist **")
+            return
+        match = re.search(r"^(.*?)(?:(?:^|,)\s*(cascade))?\s*$", args)
+        try:
+            query = self.parse_where(classname, match.group(1))
+            if query is None or set(query) != {"where"}:
+                raise ValueError(args)
+        except (TypeError, ValueError):
+            print("** invalid where clause **")
+            return
+        print(storage.destroy_where(classname, query["where"],
+                                    cascade=bool(match.group(2))))
+
+    def parse_where(self, classname, args):
+        """Parses where() arguments into storage.query() keywords.
+
+        Conditions look like price_by_night <= 100 or city_id == "abc",
+        options like order_by=-price_by_night, limit=20 or offset=40.
+        """
+        query = {"where": []}
+        for clause in re.findall(r'(?:[^,"]|"[^"]*")+', args):
+            match = re.search(r'^\s*(\w+)\s*(==|!=|<=|>=|<|>)\s*(.+?)\s*$',
+                              clause)
+            if match:
+                value = self.cast(classname, match.group(1), match.group(3))
+                query["where"].append(
+                    (match.group(1), match.group(2), value))
+                continue
+            match = re.search(
+                r'^\s*(order_by|limit|offset)\s*=\s*"?(-?\w+)"?\s*$', clause)
+            if not match:
+                return None
+            if match.group(1) == "order_by":
+                query["order_by"] = match.group(2)
+            else:
+                query[match.group(1)] = int(match.group(2))
+        return query
+
+    def cast(self, classname, attribute, value):
+        """Casts a console value to the type of attribute in classname."""
+        quoted = re.search('^"(.*)"$', value)
+        if quoted:
+            value = quoted.group(1)
+        attributes = dict(storage.attributes()["BaseModel"])
+        attributes.update(storage.attributes()[classname])
+        cast = attributes.get(attribute)
+        if cast is datetime:
+            return datetime.fromisoformat(value)
+        if cast is not None and cast is not list:
+            return cast(value)
+        if not quoted:
+            for cast in (int, float):
+                try:
+                    return cast(value)
+                except ValueError:
+                    pass
+        return value
+
     def do_EOF(self, line):
         """Handles End Of File character.
         """
         print()
+        storage.flush()
         return True
 
     def do_quit(self, line):
         """Exits the program.
         """
+        storage.flush()
+        return True
+
+    def do_begin(self, line):
+        """Starts a transaction: commands save nothing until commit.
+        """
+        try:
+            storage.begin()
+        except ValueError:
+            print("** transaction already open **")
+
+    def do_commit(self, line):
+        """Saves the changes of the transaction at once.
+        """
+        try:
+            storage.commit()
+        except io.UnsupportedOperation:
+            raise  # a ValueError too, reported by onecmd()
+        except ValueError:
+            print("** no transaction open **")
+
+    def do_rollback(self, line):
+        """Undoes the changes of the transaction.
+        """
+        try:
+            storage.rollback()
+        except ValueError:
+            print("** no transaction open **")
+
+    def batch(self, lines):
+        """Runs lines of commands as a single transaction.
+
+        The changes are saved once after the last command. The first
+        command failing, by raising or printing an ** error **, rolls
+        all of them back. Returns whether the changes were saved.
+        """
+        storage.begin()
+        for number, line in enumerate(lines, 1):
+            out = io.StringIO()
+            try:
+                with redirect_stdout(out):
+                    stop = self.onecmd(line.rstrip("\n"))
+                failed = re.search(r"^\*\* .* \*\*$", out.getvalue(), re.M)
+            except Exception as e:
+                failed = e
+            sys.stdout.write(out.getvalue())
+            if failed:
+                storage.rollback()
+                print("** line {}: rolled back **".format(number))
+                return False
+            if stop:
+                break
+        try:
+            storage.commit()
+        except ConflictError as e:
+            print("** {} **".format(e))
+            return False
         return True
 
     def emptyline(self):
@@ -104,54 +307,85 @@ class HBNBCommand(cmd.Cmd):
     def do_show(self, line):
         """Prints the string representation of an instance.
         """
-        if line == "" or line is None:
+        words = line.split(' ')
+        self.show(words[0], words[1] if len(words) > 1 else None)
+
+    def show(self, classname, uid):
+        """Prints the instance of classname with id uid."""
+        if not classname:
             print("** class name missing **")
+        elif classname not in storage.classes():
+            print("** class doesn't exist **")
+        elif uid is None:
+            print("** instance id missing **")
         else:
-            words = line.split(' ')
-            if words[0] not in storage.classes():
-                print("** class doesn't exist **")
-            elif len(words) < 2:
-                print("** instance id missing **")
+            key = "{}.{}".format(classname, uid)
+            if key not in storage.all():
+                print("** no instance found **")
             else:
-                key = "{}.{}".format(words[0], words[1])
-                if key not in storage.all():
-                    print("** no instance found **")
-                else:
-                    print(storage.all()[key])
+                print(storage.all()[key])
 
     def do_destroy(self, line):
         """Deletes an instance based on the class name and id.
         """
-        if line == "" or line is None:
+        words = line.split(' ')
+        self.destroy(words[0], words[1] if len(words) > 1 else None)
+
+    def destroy(self, classname, uid):
+        """Deletes the instance of classname with id uid."""
+        if not classname:
             print("** class name missing **")
+        elif classname not in storage.classes():
+            print("** class doesn't exist **")
+        elif uid is None:
+            print("** instance id missing **")
         else:
-            words = line.split(' ')
-            if words[0] not in storage.classes():
-                print("** class doesn't exist **")
-            elif len(words) < 2:
-                print("** instance id missing **")
+            key = "{}.{}".format(classname, uid)
+            if key not in storage.all():
+                print("** no instance found **")
             else:
-                key = "{}.{}".format(words[0], words[1])
-                if key not in storage.all():
-                    print("** no instance found **")
-                else:
-                    del storage.all()[key]
-                    storage.save()
+                storage.delete(storage.all()[key])
+                storage.save()
 
     def do_all(self, line):
         """Prints all string representation of all instances.
         """
-        if line != "":
-            words = line.split(' ')
+        words = line.split()
+        page_size = None
+        if "--page-size" in words:
+            fni = words.index("--page-size")
+            try:
+                page_size = int(words[fni + 1])
+                if page_size < 1:
+                    raise ValueError(page_size)
+            except (IndexError, ValueError):
+                print("** invalid page size **")
+                return
+            del words[fni:fni + 2]
+        if words:
             if words[0] not in storage.classes():
                 print("** class doesn't exist **")
             else:
-                nl = [str(obj) for key, obj in storage.all().items()
-                      if type(obj).__name__ == words[0]]
-                print(nl)
+                self.print_objects(storage.all(words[0]).values(), page_size)
         else:
-            new_list = [str(obj) for key, obj in storage.all().items()]
-            print(new_list)
+            self.print_objects(storage.all().values(), page_size)
+
+    def print_objects(self, objs, page_size=None):
+        """Prints the list of str() of objs, one object at a time.
+
+        The output is the same as print([str(obj) for obj in objs]), or
+        one such list per page_size objects, without building the list.
+        """
+        count = 0
+        print("[", end="")
+        for obj in objs:
+            if page_size and count == page_size:
+                print("]")
+                print("[", end="")
+                count = 0
+            print((", " if count else "") + repr(str(obj)), end="")
+            count += 1
+        print("]")
 
     def do_count(self, line):
         """Counts the instances of a class.
@@ -162,25 +396,85 @@ class HBNBCommand(cmd.Cmd):
         elif words[0] not in storage.classes():
             print("** class doesn't exist **")
         else:
-            matches = [
-                fnk for fnk in storage.all() if fnk.startswith(
-                    words[0] + '.')]
-            print(len(matches))
+            print(storage.count(words[0]))
+
+    def do_import(self, line):
+        """Creates instances from a JSON Lines or CSV file.
+
+        A record with the id of an existing instance replaces it.
+        """
+        path = self.bulk_path(line)
+        if path is None:
+            return
+        classname = line.split()[0]
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as fnf:
+                count = storage.import_records(
+                    classname, bulk.read(fnf, bulk.format_for(path)))
+        except io.UnsupportedOperation:
+            raise  # an OSError too, reported by onecmd()
+        except OSError:
+            print("** file can't be read **")
+        except (TypeError, ValueError):
+            print("** invalid record **")
+        else:
+            print(count)
+
+    def do_export(self, line):
+        """Writes the instances of a class to a JSON Lines or CSV file.
+        """
+        path = self.bulk_path(line)
+        if path is None:
+            return
+        classname = line.split()[0]
+        fmt = bulk.format_for(path)
+        columns = None
+        if fmt == "csv":
+            columns = dict.fromkeys(storage.attributes()["BaseModel"])
+            columns.update(dict.fromkeys(storage.attributes()[classname]))
+            for record in storage.export_records(classname):
+                columns.update(dict.fromkeys(record))
+            columns.pop("__class__", None)
+        try:
+            with open(path, "w", encoding="utf-8", newline="") as fnf:
+                count = bulk.write(fnf, fmt,
+                                   storage.export_records(classname),
+                                   columns)
+        except OSError:
+            print("** file can't be written **")
+        else:
+            print(count)
+
+    def bulk_path(self, line):
+        """Returns the file of import and export, or None after an error.
+        """
+        words = line.split(None, 1)
+        if not words:
+            print("** class name missing **")
+        elif words[0] not in storage.classes():
+            print("** class doesn't exist **")
+        elif len(words) < 2:
+            print("** file name missing **")
+        elif words[1].lower().endswith(tuple(bulk.formats)):
+            return words[1]
+        else:
+            print("** unknown file format **")
+        return None
 
     def do_update(self, line):
         """Updates an instance by adding or updating attribute.
         """
-        if line == "" or line is None:
+        match = UPDATE.match(line)
+        if match is None:
             print("** class name missing **")
-            return
+        else:
+            self.update(*match.groups())
 
-        rex = r'^(\S+)(?:\fns(\S+)(?:\fns(\S+)(?:\fns((?:"[^"]*")|(?:(\S)+)))?)?)?'
-        match = re.search(rex, line)
-        classname = match.group(1)
-        uid = match.group(2)
-        attribute = match.group(3)
-        value = match.group(4)
-        if not match:
+    def update(self, classname, uid, attribute, value):
+        """Sets attribute of the instance of classname with id uid to
+        value, a quoted string or a bare word cast to a number if it can.
+        """
+        if not classname:
             print("** class name missing **")
         elif classname not in storage.classes():
             print("** class doesn't exist **")
@@ -196,7 +490,7 @@ class HBNBCommand(cmd.Cmd):
                 print("** value missing **")
             else:
                 cast = None
-                if not re.search('^".*"$', value):
+                if not QUOTED.match(value):
                     if '.' in value:
                         cast = float
                     else:
@@ -216,4 +510,7 @@ class HBNBCommand(cmd.Cmd):
 
 
 if __name__ == '__main__':
+    if sys.argv[1:2] == ["--batch"] and len(sys.argv) == 3:
+        with open(sys.argv[2], "r", encoding="utf-8") as fnf:
+            sys.exit(0 if HBNBCommand().batch(fnf) else 1)
     HBNBCommand().cmdloop()
@@ -1,5 +1,23 @@
 #!/usr/bin/python3
 """Initializes the package"""
+import os
 from models.engine.file_storage import FileStorage
-storage = FileStorage()
+FileStorage.journal = os.getenv("HBNB_STORAGE_JOURNAL") == "1"
+FileStorage.lazy = os.getenv("HBNB_STORAGE_LAZY") == "1"
+FileStorage.compact_models = os.getenv("HBNB_STORAGE_COMPACT") == "1"
+FileStorage.write_behind = os.getenv("HBNB_STORAGE_WRITE_BEHIND") == "1"
+FileStorage.set_durability(os.getenv("HBNB_STORAGE_DURABILITY", "atomic"))
+FileStorage.format = os.getenv("HBNB_STORAGE_FORMAT")
+FileStorage.mapped = os.getenv("HBNB_STORAGE_MAPPED") == "1"
+FileStorage.shared = os.getenv("HBNB_STORAGE_SHARED") == "1"
+FileStorage.threaded = os.getenv("HBNB_STORAGE_THREADED") == "1"
+FileStorage.sharded = os.getenv("HBNB_STORAGE_SHARDED") == "1"
+FileStorage.reload_workers = int(os.getenv("HBNB_STORAGE_RELOAD_WORKERS",
+                                           "0"))
+FileStorage.set_file_path(os.getenv("HBNB_STORAGE_PATH"))
+if os.getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(os.getenv("HBNB_DB_PATH", "file.db"))
+else:
+    storage = FileStorage()
 storage.reload()
@@ -1,15 +1,63 @@
 #!/usr/bin/python3
 """This script is the base model"""
 
+import sys
 import uuid
 from datetime import datetime
 from models import storage
 
 
+def parse_datetime(value):
+    """returns the datetime for a string written by to_dict()
+
+    isoformat() leaves the microseconds out when they are 0, which
+    fromisoformat() reads back as well, at a fraction of the cost of
+    strptime().
+    """
+
+    if type(value) is datetime:
+        return value
+    return datetime.fromisoformat(value)
+
+
+class Registry(dict):
+
+    """Dictionary of the models counting in version the times a model
+    was set or deleted, so caches built from it can tell it changed"""
+
+    version = 0
+
+    def __setitem__(self, name, cls):
+        """sets the model of name"""
+        super().__setitem__(name, cls)
+        self.version += 1
+
+    def __delitem__(self, name):
+        """deletes the model of name"""
+        super().__delitem__(name)
+        self.version += 1
+
+
+registry = Registry()
+"""class name -> model, each model adds itself when it is defined"""
+
+
 class BaseModel:
 
     """Class from which all other classes will inherit"""
 
+    def __init_subclass__(cls, register=True, **kwargs):
+        """adds the model to the registry
+
+        Args:
+            - register: False for variants of a model that must not
+              replace it, such as those of compact_class()
+        """
+
+        super().__init_subclass__(**kwargs)
+        if register:
+            registry[cls.__name__] = cls
+
     def __init__(self, *args, **kwargs):
         """Initializes instance attributes
 
@@ -21,11 +69,11 @@ class BaseModel:
         if kwargs is not None and kwargs != {}:
             for key in kwargs:
                 if key == "created_at":
-                    self.__dict__["created_at"] = datetime.strptime(
-                        kwargs["created_at"], "%Y-%m-%dT%H:%M:%S.%f")
+                    self.__dict__["created_at"] = parse_datetime(
+                        kwargs["created_at"])
                 elif key == "updated_at":
-                    self.__dict__["updated_at"] = datetime.strptime(
-                        kwargs["updated_at"], "%Y-%m-%dT%H:%M:%S.%f")
+                    self.__dict__["updated_at"] = parse_datetime(
+                        kwargs["updated_at"])
                 else:
                     self.__dict__[key] = kwargs[key]
         else:
@@ -34,6 +82,13 @@ class BaseModel:
             self.updated_at = datetime.now()
             storage.new(self)
 
+    def __setattr__(self, name, value):
+        """sets an attribute and marks the instance as changed"""
+
+        with storage.lock:
+            storage.touch(self, name, value)
+            super().__setattr__(name, value)
+
     def __str__(self):
         """Returns official string representation"""
 
@@ -44,6 +99,7 @@ class BaseModel:
         """updates the public instance attribute updated_at"""
 
         self.updated_at = datetime.now()
+        storage.touch(self)
         storage.save()
 
     def to_dict(self):
@@ -54,3 +110,95 @@ class BaseModel:
         fn_dict["created_at"] = fn_dict["created_at"].isoformat()
         fn_dict["updated_at"] = fn_dict["updated_at"].isoformat()
         return fn_dict
+
+
+registry["BaseModel"] = BaseModel
+_compact_classes = {}
+
+
+def compact_class(cls):
+    """returns a variant of cls keeping its attributes in __slots__
+
+    The id, the timestamps and the attributes listed for cls in
+    storage.attributes() live in slots, any other attribute in a dict
+    created on first use, so an instance carries no __dict__ of its own.
+    Loaded foreign keys are interned, being shared by many instances.
+    Unset attributes still fall back to the defaults of cls, and
+    to_dict(), __str__ and setattr() behave as they do on cls.
+    """
+
+    if cls in _compact_classes:
+        return _compact_classes[cls]
+    names = ("id", "created_at", "updated_at") + tuple(
+        storage.attributes().get(cls.__name__, {}))
+    slots = frozenset(names)
+    shared = frozenset(storage.indexes().get(cls.__name__, ()))
+
+    def __init__(self, *args, **kwargs):
+        """Initializes instance attributes"""
+
+        object.__setattr__(self, "_extra", None)
+        if not kwargs:
+            cls.__init__(self, *args)
+            return
+        for key, value in kwargs.items():
+            if key in ("created_at", "updated_at"):
+                value = parse_datetime(value)
+            elif key == "__class__":
+                continue
+            elif key in shared and type(value) is str:
+                value = sys.intern(value)
+            store(self, key, value)
+
+    def store(self, name, value):
+        """stores an attribute in its slot or in the extra dict"""
+
+        if name in slots:
+            object.__setattr__(self, name, value)
+        elif self._extra is None:
+            object.__setattr__(self, "_extra", {name: value})
+        else:
+            self._extra[name] = value
+
+    def __setattr__(self, name, value):
+        """sets an attribute and marks the instance as changed"""
+
+        with storage.lock:
+            storage.touch(self, name, value)
+            store(self, name, value)
+
+    def __getattr__(self, name):
+        """returns extra attributes, then the defaults of cls"""
+
+        extra = object.__getattribute__(self, "_extra")
+        if extra is not None and name in extra:
+            return extra[name]
+        if name in slots and hasattr(cls, name):
+            return getattr(cls, name)
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            cls.__name__, name))
+
+    def __dict__(self):
+        """the attributes set on the instance, like a regular __dict__"""
+
+        fn_dict = {}
+        for name in names:
+            try:
+                fn_dict[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        if self._extra:
+            fn_dict.update(self._extra)
+        return fn_dict
+
+    namespace = {"__slots__": names + ("_extra",),
+                 "__module__": cls.__module__,
+                 "__qualname__": cls.__qualname__,
+                 "__doc__": cls.__doc__,
+                 "__init__": __init__,
+                 "__setattr__": __setattr__,
+                 "__getattr__": __getattr__,
+                 "__dict__": property(__dict__)}
+    _compact_classes[cls] = type(cls.__name__, (cls,), namespace,
+                                 register=False)
+    return _compact_classes[cls]
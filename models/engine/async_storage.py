@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""Module for the AsyncStorage class."""
+import asyncio
+
+
+class AsyncStorage:
+
+    """asyncio facade over a storage engine
+
+    asave() and areload() run the blocking save() and reload() of the
+    engine in an executor, so the event loop keeps serving while the
+    file is encoded and written. Any other attribute is the engine's.
+    """
+
+    def __init__(self, storage, executor=None):
+        """Initializes the facade
+
+        Args:
+            - storage: the engine, e.g. models.storage
+            - executor: concurrent.futures executor to run the engine
+              in; None uses the default executor of the loop
+        """
+        self.__storage = storage
+        self.__executor = executor
+        self.__next = None
+        self.__writing = None
+
+    def __getattr__(self, name):
+        """returns the attribute name of the engine"""
+        return getattr(self.__storage, name)
+
+    async def __run(self, function, *args):
+        """runs function(*args) in the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, function, *args)
+
+    def __write(self):
+        """saves and waits until the engine wrote the file"""
+        self.__storage.save()
+        self.__storage.flush()
+
+    async def asave(self):
+        """saves the objects as they are now
+
+        Saves awaited while a write is running share the next write:
+        the running one may have taken its snapshot before they were
+        asked for.
+        """
+        if self.__next is None:
+            self.__next = asyncio.get_running_loop().create_future()
+            if self.__writing is None:
+                self.__writing = asyncio.ensure_future(self.__drain())
+        await asyncio.shield(self.__next)
+
+    async def __drain(self):
+        """writes until no save is waiting for a write"""
+        try:
+            while self.__next is not None:
+                future, self.__next = self.__next, None
+                try:
+                    await self.__run(self.__write)
+                except Exception as error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(None)
+        finally:
+            self.__writing = None
+
+    async def areload(self):
+        """reloads the objects, waiting for the saves asked for first"""
+        if self.__writing is not None:
+            await asyncio.shield(self.__writing)
+        await self.__run(self.__storage.reload)
+
+    async def aquery(self, cls, where=(), order_by=None, limit=None,
+                     offset=0):
+        """iterates the objects query() returns for the same arguments
+
+        The query runs in the executor; the loop gets control back
+        between objects.
+        """
+        objs = await self.__run(self.__storage.query, cls, where,
+                                order_by, limit, offset)
+        for obj in objs:
+            yield obj
+            await asyncio.sleep(0)
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""Module for importing and exporting the objects of a class in bulk.
+
+Records are streamed one per line in JSON Lines (.jsonl, .ndjson) or
+one per row in CSV (.csv), whose header names the attributes. In CSV,
+lists are written as JSON and empty cells are left out on import.
+"""
+import csv
+import json
+import os
+import uuid
+from datetime import datetime
+
+formats = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+
+
+def format_for(path):
+    """returns the format of the file at path, from its extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in formats:
+        raise ValueError("unknown file format: " + path)
+    return formats[extension]
+
+
+def read(fnf, fmt):
+    """iterates the records of the open text file fnf
+
+    Raises ValueError on a JSON line that is not an object.
+    """
+    if fmt == "csv":
+        for row in csv.DictReader(fnf):
+            yield {fnk: fnv for fnk, fnv in row.items() if fnv != ""}
+        return
+    for line in fnf:
+        if line.strip():
+            record = json.loads(line)
+            if type(record) is not dict:
+                raise ValueError("not an object: " + line.strip())
+            yield record
+
+
+def write(fnf, fmt, records, columns=None):
+    """writes records to the open text file fnf, returns their number
+
+    columns names the CSV columns; attributes of records not listed are
+    left out.
+    """
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(fnf, columns, extrasaction="ignore")
+        writer.writeheader()
+        for record in records:
+            writer.writerow({fnk: json.dumps(fnv)
+                             if isinstance(fnv, (list, dict)) else fnv
+                             for fnk, fnv in record.items()})
+            count += 1
+        return count
+    for record in records:
+        fnf.write(json.dumps(record) + "\n")
+        count += 1
+    return count
+
+
+def cast(values, types):
+    """returns values with each value cast to the type of its attribute
+
+    types maps attribute names to the types listed by attributes();
+    strings of lists are decoded as JSON and datetimes are left to
+    BaseModel. Attributes without a type keep their value.
+    """
+    fnd = {}
+    for fnk, fnv in values.items():
+        fnt = types.get(fnk)
+        if fnt is None or fnt is datetime or type(fnv) is fnt:
+            fnd[fnk] = fnv
+        elif fnt is list:
+            fnd[fnk] = json.loads(fnv) if type(fnv) is str else list(fnv)
+        else:
+            fnd[fnk] = fnt(fnv)
+    return fnd
+
+
+def coerce(record, name, types):
+    """returns the raw record of class name for an imported record
+
+    Values are cast by cast(), and the id and timestamps are filled in
+    when missing.
+    """
+    fnd = cast(record, types)
+    if not fnd.get("id"):
+        fnd["id"] = str(uuid.uuid4())
+    if "created_at" not in fnd or "updated_at" not in fnd:
+        now = datetime.now()
+        fnd.setdefault("created_at", now)
+        fnd.setdefault("updated_at", now)
+    fnd["__class__"] = name
+    return fnd
@@ -0,0 +1,318 @@
+#!/usr/bin/python3
+"""Module for DBStorage class."""
+import datetime
+import json
+import sqlite3
+import threading
+from models.engine.file_storage import FileStorage
+from models.engine.undo_log import UndoLog
+
+
+class DBStorage:
+
+    """Class for storing and retrieving data in a SQLite database
+
+    Every model class gets a table with one column per attribute listed
+    in attributes(), an index on each foreign key of indexes(), and an
+    extra column holding the other attributes as JSON. Loaded objects
+    are kept in memory like FileStorage does, and save() only writes the
+    rows of the objects changed since the last save, and of those
+    holding lists or dicts.
+    """
+
+    classes = FileStorage.classes
+    attributes = FileStorage.attributes
+    indexes = FileStorage.indexes
+    cascades = FileStorage.cascades
+    operators = FileStorage.operators
+    import_records = FileStorage.import_records
+    export_records = FileStorage.export_records
+    update_where = FileStorage.update_where
+    destroy_where = FileStorage.destroy_where
+    # held by BaseModel while it sets an attribute, like FileStorage.lock
+    lock = threading.RLock()
+
+    def __init__(self, path="file.db"):
+        """Initializes the storage
+
+        Args:
+            - path: path of the SQLite database file
+        """
+        self.__path = path
+        self.__db = None
+        self.__objects = {}
+        self.__by_class = {}
+        self.__stored = set()
+        self.__changes = {}
+        self.__undo = None
+
+    def __connect(self):
+        """returns the database connection, creating the tables if needed"""
+        if self.__db is None:
+            self.__db = sqlite3.connect(self.__path, check_same_thread=False)
+            for name in self.classes():
+                columns = ", ".join(
+                    '"{}" {}'.format(column, self.__type(name, column))
+                    for column in self.columns(name) if column != "id")
+                self.__db.execute(
+                    'CREATE TABLE IF NOT EXISTS "{}" '
+                    '(id TEXT PRIMARY KEY, {}, extra TEXT)'.format(
+                        name, columns))
+                for column in self.indexes()[name]:
+                    self.__db.execute(
+                        'CREATE INDEX IF NOT EXISTS "{0}_{1}" '
+                        'ON "{0}" ("{1}")'.format(name, column))
+            self.__db.commit()
+        return self.__db
+
+    def columns(self, name):
+        """returns the columns of the table of class name"""
+        return tuple(self.attributes()["BaseModel"]) + tuple(
+            fnk for fnk in self.attributes()[name]
+            if fnk not in self.attributes()["BaseModel"])
+
+    def __type(self, name, column):
+        """returns the SQL type of column in the table of class name"""
+        fnt = dict(self.attributes()["BaseModel"],
+                   **self.attributes()[name])[column]
+        return {int: "INTEGER", float: "REAL"}.get(fnt, "TEXT")
+
+    @staticmethod
+    def __name(cls):
+        """returns the class name for a class or a class name"""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def all(self, cls=None):
+        """returns the dictionary of the stored objects
+
+        Args:
+            - cls: class or class name to only return the objects of
+        """
+        if cls is None:
+            return self.__objects
+        return dict(self.__by_class.get(self.__name(cls), {}))
+
+    def count(self, cls=None):
+        """returns the number of objects, only those of cls if given"""
+        if cls is None:
+            return len(self.__objects)
+        return len(self.__by_class.get(self.__name(cls), {}))
+
+    def new(self, obj):
+        """adds obj to the stored objects"""
+        name = type(obj).__name__
+        key = "{}.{}".format(name, obj.id)
+        if self.__undo is not None:
+            self.__undo.new(obj, self.__objects.get(key))
+        self.__objects[key] = obj
+        self.__by_class.setdefault(name, {})[key] = obj
+        self.__changes[key] = obj
+
+    def delete(self, obj):
+        """removes obj from the stored objects"""
+        name = type(obj).__name__
+        key = "{}.{}".format(name, obj.id)
+        self.__by_class.get(name, {}).pop(key, None)
+        if self.__objects.pop(key, None) is not None:
+            self.__changes[key] = None
+            if self.__undo is not None:
+                self.__undo.delete(obj)
+
+    def touch(self, obj, attribute=None, value=None):
+        """marks obj as changed since the last save"""
+        key = "{}.{}".format(type(obj).__name__, getattr(obj, "id", None))
+        if self.__objects.get(key) is obj:
+            self.__changes[key] = obj
+            if attribute is not None and self.__undo is not None:
+                self.__undo.set(obj, attribute)
+
+    def save(self):
+        """writes the changed rows and commits them, unless a transaction
+        is open
+
+        Objects holding lists or dicts, which can change in place, are
+        written every time, like FileStorage does.
+        """
+        if self.__undo is not None:
+            return
+        for key, obj in self.__objects.items():
+            if key not in self.__changes and any(
+                    type(value) is list or type(value) is dict
+                    for value in obj.__dict__.values()):
+                self.__changes[key] = obj
+        self.__write()
+        self.__connect().commit()
+
+    def begin(self):
+        """starts a transaction, see FileStorage.begin()"""
+        if self.__undo is not None:
+            raise ValueError("a transaction is already open")
+        self.__undo = UndoLog()
+
+    def commit(self):
+        """ends the transaction and saves its changes at once"""
+        if self.__undo is None:
+            raise ValueError("no transaction is open")
+        self.__undo = None
+        self.save()
+
+    def rollback(self):
+        """ends the transaction, undoing its changes to the objects"""
+        undo, self.__undo = self.__undo, None
+        if undo is None:
+            raise ValueError("no transaction is open")
+        undo.undo(self)
+
+    def flush(self):
+        """saves if anything changed since the last save"""
+        if self.__changes or self.__connect().in_transaction:
+            self.save()
+
+    def close(self):
+        """closes the database connection, dropping uncommitted writes"""
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+    def __write(self):
+        """writes the changed rows, leaving the transaction open"""
+        db = self.__connect()
+        changes, self.__changes = self.__changes, {}
+        for key, obj in changes.items():
+            name, uid = key.split(".", 1)
+            if obj is None:
+                db.execute('DELETE FROM "{}" WHERE id = ?'.format(name),
+                           (uid,))
+                self.__stored.discard(key)
+                continue
+            columns = self.columns(name) + ("extra",)
+            row = self.__row(obj, name)
+            if key in self.__stored:
+                db.execute('UPDATE "{}" SET {} WHERE id = ?'.format(
+                    name, ", ".join('"{}" = ?'.format(fnc)
+                                    for fnc in columns)), row + (uid,))
+            else:
+                db.execute('INSERT OR REPLACE INTO "{}" ({}) '
+                           'VALUES ({})'.format(
+                               name, ", ".join('"{}"'.format(fnc)
+                                               for fnc in columns),
+                               ", ".join("?" * len(columns))), row)
+                self.__stored.add(key)
+
+    def __row(self, obj, name):
+        """returns the column values of obj"""
+        fnd = obj.to_dict()
+        del fnd["__class__"]
+        row = []
+        for column in self.columns(name):
+            value = fnd.pop(column, None)
+            if isinstance(value, (list, dict)):
+                value = json.dumps(value)
+            row.append(value)
+        row.append(json.dumps(fnd) if fnd else None)
+        return tuple(row)
+
+    def __column(self, name, column):
+        """returns the SQL expression reading column of the table of class
+        name and its parameters
+
+        Attributes never set on an object are stored as NULL; they read
+        as the default of the model, as they do on the object and in
+        FileStorage.
+        """
+        from models.base_model import registry
+        default = getattr(registry.get(name), column, None)
+        if default is None:
+            return '"{}"'.format(column), []
+        if isinstance(default, (list, dict)):
+            default = json.dumps(default)
+        return 'COALESCE("{}", ?)'.format(column), [default]
+
+    def reload(self):
+        """Reloads the stored objects from the database"""
+        db = self.__connect()
+        db.rollback()
+        classes = self.classes()
+        objects = {}
+        by_class = {}
+        for name, cls in classes.items():
+            columns = self.columns(name)
+            types = self.attributes()[name]
+            cursor = db.execute('SELECT {}, extra FROM "{}"'.format(
+                ", ".join('"{}"'.format(fnc) for fnc in columns), name))
+            for row in cursor:
+                fnd = {column: value
+                       for column, value in zip(columns, row)
+                       if value is not None}
+                for column, value in fnd.items():
+                    if types.get(column) is list and type(value) is str:
+                        fnd[column] = json.loads(value)
+                if row[-1] is not None:
+                    fnd.update(json.loads(row[-1]))
+                key = "{}.{}".format(name, fnd["id"])
+                objects[key] = cls(**fnd)
+                by_class.setdefault(name, {})[key] = objects[key]
+        self.__objects = objects
+        self.__by_class = by_class
+        self.__stored = set(objects)
+        self.__changes = {}
+
+    def lookup(self, cls, attribute, value):
+        """returns the objects of cls whose attribute equals value"""
+        name = self.__name(cls)
+        return {"{}.{}".format(name, obj.id): obj
+                for obj in self.query(name, [(attribute, "==", value)])}
+
+    def query(self, cls, where=(), order_by=None, limit=None, offset=0):
+        """returns the objects of cls matching every condition of where
+
+        Takes the same arguments as FileStorage.query(). Conditions and
+        ordering on columns run in SQL, after the pending changes were
+        written to the open transaction; others are checked in memory.
+        """
+        name = self.__name(cls)
+        columns = self.columns(name)
+        sql_where = [fnw for fnw in where if fnw[0] in columns]
+        memory = [(attribute, self.operators[op], value)
+                  for attribute, op, value in where
+                  if attribute not in columns]
+        if order_by is not None and order_by.lstrip("-") not in columns:
+            objs = [obj for obj in self.query(name, where)]
+            attribute = order_by.lstrip("-")
+            objs.sort(key=lambda obj: getattr(obj, attribute, None),
+                      reverse=order_by.startswith("-"))
+            stop = None if limit is None else offset + limit
+            return objs[offset:stop]
+        sql = 'SELECT id FROM "{}"'.format(name)
+        params = []
+        if sql_where:
+            terms = []
+            for attribute, op, value in sql_where:
+                column, default = self.__column(name, attribute)
+                terms.append("{} {} ?".format(column,
+                                              "=" if op == "==" else op))
+                params += default + [
+                    value.isoformat()
+                    if isinstance(value, datetime.datetime) else value]
+            sql += " WHERE " + " AND ".join(terms)
+        if order_by is not None:
+            column, default = self.__column(name, order_by.lstrip("-"))
+            sql += " ORDER BY {}{}, rowid".format(
+                column, " DESC" if order_by.startswith("-") else "")
+            params += default
+        else:
+            sql += " ORDER BY rowid"
+        if limit is not None and not memory:
+            sql += " LIMIT {:d} OFFSET {:d}".format(limit, offset)
+        self.__write()
+        objs = []
+        for (uid,) in self.__connect().execute(sql, params):
+            obj = self.__objects.get("{}.{}".format(name, uid))
+            if obj is not None and all(
+                    test(getattr(obj, attribute, None), value)
+                    for attribute, test, value in memory):
+                objs.append(obj)
+        if memory:
+            stop = None if limit is None else offset + limit
+            objs = objs[offset:stop]
+        return objs
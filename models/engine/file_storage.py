@@ -1,8 +1,50 @@
 #!/usr/bin/python3
 """Module for FileStorage class."""
+import atexit
+import contextlib
 import datetime
+import heapq
+import io
+import itertools
 import json
+import multiprocessing
+import operator
 import os
+import re
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from models.engine.lazy_objects import LazyObjects
+from models.engine import mapped_objects
+from models.engine.mapped_objects import MappedObjects
+from models.engine import bulk
+from models.engine import serializers
+from models.engine.serializers import serializer_for
+from models.engine.undo_log import UndoLog
+try:
+    import fcntl
+except ImportError:
+    # no advisory locks on this platform, the shared mode cannot lock
+    fcntl = None
+
+
+def _build_chunk(chunk):
+    """returns the instances of the records of a piece of a JSON
+    snapshot, in a reload worker"""
+    classes = FileStorage().classes()
+    return {fnk: classes[fnv["__class__"]](**fnv)
+            for fnk, fnv in json.loads("{" + chunk + "}").items()}
+
+
+class ConflictError(Exception):
+
+    """Raised by save() in shared mode when objects changed here were
+    changed by another process too since they were read"""
+
+    def __init__(self, keys):
+        """Initializes the error with the conflicting keys"""
+        super().__init__("changed by another process: " + ", ".join(keys))
+        self.keys = keys
 
 
 class FileStorage:
@@ -10,86 +52,1205 @@ class FileStorage:
     """Class for storing and retrieving data"""
     __file_path = "file.json"
     __objects = {}
+    __changes = {}
+    __fragments = {}
+    __journal_size = 0
+    __compactor = None
+    __deferred = 0
+    __timer = None
+    __at_exit = False
+    __flush_lock = threading.RLock()
+    __by_class = {}
+    __by_value = {}
+    __indexed = None
+    __seen = None
+    __versions = {}
+    __write_lock = threading.Lock()
+    __handed = False
+    __writer = None
+    __wake = threading.Condition()
+    __requested = 0
+    __written = 0
+    __error = None
+    __registry = None
+    __classes = (None, None)
+    __attributes = (None, None)
+    __undo = None
+    __loaded = {}
+
+    # journal mode: save() appends one record per changed object to
+    # <file_path>.log and compaction folds the log back into the snapshot
+    journal = False
+    compact_after = 1000
+    # lazy mode: reload() keeps the raw records and only builds an
+    # instance when its key is first looked up in all()
+    lazy = False
+    # compact mode: classes() hands out variants of the models keeping
+    # their attributes in __slots__ (see models.base_model.compact_class)
+    compact_models = False
+    # write-behind mode: save() only records that a write is due, the
+    # file is written after flush_after saves, flush_interval seconds,
+    # an explicit flush() or at exit
+    write_behind = False
+    flush_after = 100
+    flush_interval = 1.0
+    # how save() writes the file: "fast" overwrites it in place, "atomic"
+    # renames a complete temporary file over it and "durable" also fsyncs
+    # (see set_durability())
+    durability = "atomic"
+    # file format, one of models.engine.serializers.serializers; None
+    # picks it from the extension of the file, which must not be that of
+    # another format (see set_file_path())
+    format = None
+    # mapped mode: reload() maps the read-only snapshot snapshot() wrote
+    # to <file_path>.snap and builds objects when first looked up;
+    # new(), delete(), changing a stored object and save() are refused.
+    # A snapshot older than the last write of the file is not mapped:
+    # reload() reads the file as usual until snapshot() is run again
+    mapped = False
+    # shared mode: several processes may use the file at once; saves hold
+    # an fcntl lock on <file_path>.lock and first merge what the others
+    # wrote, refusing objects both sides changed since they were read
+    # (told apart by updated_at); reads first pick up the others' writes
+    shared = False
+    # parallel reload: with 2 or more reload_workers, reload() has the
+    # records of a JSON snapshot built by a pool of as many processes.
+    # The reload() of import models reads serially: the pool could not
+    # import the package before it is fully imported.
+    reload_workers = 0
+    # threaded mode: all() hands out __objects copied on write, so other
+    # threads may change it while it is iterated, and save() hands the
+    # write over to a single writer thread; flush() waits for it
+    threaded = False
+    # sharded mode: the objects of each class are kept in a file of their
+    # own, <file_path> with the class name before the extension; save()
+    # only rewrites the files of the classes that changed, in parallel.
+    # reload() reads the shards concurrently, and the single file too,
+    # whatever the mode; migrate(), or else the next save(), splits the
+    # single file. A save outside the sharded mode folds the shards back
+    # into the single file. Neither removes a file changed since read.
+    # The journal and shared modes keep the single file.
+    sharded = False
+    # the (parent class name, child class name, foreign key) edges a
+    # cascading destroy_where() follows: a State takes its cities with
+    # it, a City its places and a Place its reviews. Other foreign keys,
+    # like Place.user_id, are left alone.
+    cascading = (("State", "City", "state_id"),
+                 ("City", "Place", "city_id"),
+                 ("Place", "Review", "place_id"))
+    # held while __objects, its indexes or the objects in it change, and
+    # while what save() writes is taken from them
+    lock = threading.RLock()
+
+    operators = {"==": operator.eq, "!=": operator.ne,
+                 "<": operator.lt, "<=": operator.le,
+                 ">": operator.gt, ">=": operator.ge}
+
+    @staticmethod
+    def set_file_path(path=None):
+        """points FileStorage at the file at path, read by reload()
+
+        path defaults to file.json, or to file.pickle and the like when
+        format is set. Raises a ValueError if format is unknown or if the
+        extension of path is that of another format.
+        """
+        if path is None:
+            path = "file" + serializer_for(
+                "file", FileStorage.format).extensions[0]
+        serializer_for(path, FileStorage.format)
+        FileStorage.__file_path = path
+
+    @staticmethod
+    def set_durability(durability="atomic"):
+        """sets how save() writes the file, see durability
+
+        Raises a ValueError if durability is not fast, atomic or durable.
+        """
+        FileStorage.__check_durability(durability)
+        FileStorage.durability = durability
+
+    @staticmethod
+    def __check_durability(durability):
+        """raises a ValueError if durability is not a known one"""
+        if durability not in ("fast", "atomic", "durable"):
+            raise ValueError("unknown durability {}, not one of fast, "
+                             "atomic, durable".format(durability))
+
+    def all(self, cls=None):
+        """returns the dictionary __objects
+
+        Args:
+            - cls: class or class name to only return the objects of
+        """
+        self.__check()
+        with FileStorage.lock:
+            if cls is None:
+                FileStorage.__handed = FileStorage.threaded
+                return FileStorage.__objects
+            objects = FileStorage.__objects
+            keys = self.__class_index().get(self.__name(cls), {})
+            return {fnk: objects[fnk] for fnk in keys if fnk in objects}
+
+    def count(self, cls=None):
+        """returns the number of objects, only those of cls if given"""
+        self.__check()
+        with FileStorage.lock:
+            if cls is None:
+                return len(FileStorage.__objects)
+            return len(self.__class_index().get(self.__name(cls), {}))
+
+    @staticmethod
+    def __name(cls):
+        """returns the class name for a class or a class name"""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def __class_index(self):
+        """returns the class name -> {key: None} index of __objects
+
+        The index is rebuilt whenever __objects was replaced since it was
+        built, e.g. by reload(); new() and delete() keep it up to date.
+        """
+        if FileStorage.__indexed is not FileStorage.__objects:
+            index = {}
+            for fnk in FileStorage.__objects:
+                index.setdefault(fnk.split(".", 1)[0], {})[fnk] = None
+            FileStorage.__by_class = index
+            FileStorage.__by_value = {}
+            FileStorage.__indexed = FileStorage.__objects
+        return FileStorage.__by_class
+
+    def lookup(self, cls, attribute, value):
+        """returns the objects of cls whose attribute equals value
+
+        Attributes listed by indexes() are answered from an index built
+        on first use, in time proportional to the number of matches.
+        """
+        self.__check()
+        with FileStorage.lock:
+            name = self.__name(cls)
+            objects = FileStorage.__objects
+            if attribute in self.indexes().get(name, ()):
+                keys = self.__value_index(name, attribute).get(value, {})
+            else:
+                keys = [fnk for fnk in self.__class_index().get(name, {})
+                        if self.__value(fnk, attribute) == value]
+            return {fnk: objects[fnk] for fnk in keys}
+
+    def query(self, cls, where=(), order_by=None, limit=None, offset=0):
+        """returns the objects of cls matching every condition of where
+
+        Args:
+            - cls: class or class name to query
+            - where: list of (attribute, operator, value) conditions,
+              operator being one of ==, !=, <, <=, >, >=
+            - order_by: attribute to sort on, prefixed with - to sort
+              in descending order
+            - limit: maximum number of objects to return
+            - offset: number of matching objects to skip first
+
+        An equality on an indexed attribute narrows the candidates to
+        its index; without order_by the scan stops after limit matches.
+        """
+        self.__check()
+        with FileStorage.lock:
+            name = self.__name(cls)
+            tests = [(attribute, self.operators[op], value)
+                     for attribute, op, value in where]
+            keys = self.__class_index().get(name, {})
+            indexed = self.indexes().get(name, ())
+            for attribute, op, value in where:
+                if op == "==" and attribute in indexed:
+                    found = self.__value_index(name, attribute).get(value,
+                                                                    {})
+                    if len(found) < len(keys):
+                        keys = found
+            matches = (fnk for fnk in list(keys)
+                       if all(test(self.__value(fnk, attribute), value)
+                              for attribute, test, value in tests))
+            if order_by is not None:
+                reverse = order_by.startswith("-")
+                attribute = order_by.lstrip("-")
+
+                def sort_key(fnk):
+                    return self.__value(fnk, attribute)
+                if limit is not None and not reverse:
+                    matches = heapq.nsmallest(offset + limit, matches,
+                                              sort_key)
+                elif limit is not None:
+                    matches = heapq.nlargest(offset + limit, matches,
+                                             sort_key)
+                else:
+                    matches = sorted(matches, key=sort_key,
+                                     reverse=reverse)
+            stop = None if limit is None else offset + limit
+            objects = FileStorage.__objects
+            return [objects[fnk]
+                    for fnk in itertools.islice(matches, offset, stop)]
+
+    def __value_index(self, name, attribute):
+        """returns the value -> {key: None} index of attribute in name"""
+        by_class = self.__class_index()
+        index = FileStorage.__by_value.get((name, attribute))
+        if index is None:
+            index = {}
+            for fnk in by_class.get(name, {}):
+                index.setdefault(self.__value(fnk, attribute), {})[fnk] = None
+            FileStorage.__by_value[(name, attribute)] = index
+        return index
+
+    def __value(self, key, attribute):
+        """returns attribute of the object at key without building it"""
+        objects = FileStorage.__objects
+        if type(objects) is MappedObjects:
+            fnv = objects.raw(key)
+        else:
+            fnv = dict.__getitem__(objects, key)
+        if type(fnv) is dict:
+            cls = self.classes()[fnv["__class__"]]
+            value = fnv.get(attribute, getattr(cls, attribute, None))
+            if attribute in ("created_at", "updated_at") and \
+                    type(value) is str:
+                # as the instance will hold it once built
+                from models.base_model import parse_datetime
+                value = parse_datetime(value)
+            return value
+        return getattr(fnv, attribute, None)
+
+    def __reindex(self, obj, key, attribute, old, value):
+        """moves key from old to value in the index of attribute"""
+        index = FileStorage.__by_value.get((type(obj).__name__, attribute))
+        if index is None or old == value:
+            return
+        keys = index.get(old)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del index[old]
+        index.setdefault(value, {})[key] = None
+
+    def __cow(self):
+        """copies __objects before a change if all() handed it out
 
-    def all(self):
-        """returns the dictionary __objects"""
-        return FileStorage.__objects
+        Only in threaded mode, so that threads iterating what all()
+        returned never see it change size under them.
+        """
+        if FileStorage.__handed:
+            objects = FileStorage.__objects.copy()
+            if FileStorage.__indexed is FileStorage.__objects:
+                FileStorage.__indexed = objects
+            FileStorage.__objects = objects
+            FileStorage.__handed = False
 
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
-        key = "{}.{}".format(type(obj).__name__, obj.id)
-        FileStorage.__objects[key] = obj
+        name = type(obj).__name__
+        key = "{}.{}".format(name, obj.id)
+        self.__writable()
+        with FileStorage.lock:
+            self.__cow()
+            self.__class_index().setdefault(name, {})[key] = None
+            if FileStorage.__by_value:
+                stored = key in FileStorage.__objects
+                for attribute in self.indexes().get(name, ()):
+                    # an object replaced under the same key leaves its bucket
+                    old = self.__value(key, attribute) if stored else None
+                    self.__reindex(obj, key, attribute, old,
+                                   getattr(obj, attribute, None))
+            if FileStorage.__undo is not None:
+                FileStorage.__undo.new(obj, FileStorage.__objects.get(key))
+            FileStorage.__objects[key] = obj
+            FileStorage.__changes[key] = obj
+            FileStorage.__fragments.pop(key, None)
+
+    def delete(self, obj):
+        """removes obj from __objects"""
+        name = type(obj).__name__
+        key = "{}.{}".format(name, obj.id)
+        self.__writable()
+        with FileStorage.lock:
+            self.__cow()
+            self.__class_index().get(name, {}).pop(key, None)
+            if FileStorage.__by_value:
+                for attribute in self.indexes().get(name, ()):
+                    index = FileStorage.__by_value.get((name, attribute), {})
+                    index.get(getattr(obj, attribute, None), {}).pop(key,
+                                                                     None)
+            if FileStorage.__objects.pop(key, None) is not None:
+                FileStorage.__changes[key] = None
+                if FileStorage.__undo is not None:
+                    FileStorage.__undo.delete(obj)
+            FileStorage.__fragments.pop(key, None)
+
+    def touch(self, obj, attribute=None, value=None):
+        """marks obj as changed since the last save
+
+        BaseModel calls it right before setting attribute to value, so
+        the indexes can move obj from the old value to the new one.
+        """
+        key = "{}.{}".format(type(obj).__name__, getattr(obj, "id", None))
+        with FileStorage.lock:
+            if FileStorage.__objects.get(key) is obj:
+                self.__writable()
+                FileStorage.__changes[key] = obj
+                FileStorage.__fragments.pop(key, None)
+                if attribute is not None and FileStorage.__undo is not None:
+                    FileStorage.__undo.set(obj, attribute)
+                if attribute is not None and FileStorage.__by_value:
+                    self.__reindex(obj, key, attribute,
+                                   getattr(obj, attribute, None), value)
 
     def save(self):
         """ serializes __objects to the JSON file (path: __file_path)"""
-        with open(FileStorage.__file_path, "w", encoding="utf-8") as fnf:
-            fnd = {fnk: fnv.to_dict() for fnk, fnv in FileStorage.__objects.items()}
-            json.dump(fnd, fnf)
+        self.__writable()
+        if FileStorage.threaded:
+            self.__request()
+            return
+        if FileStorage.write_behind:
+            self.__defer()
+            return
+        self.__write()
+
+    @staticmethod
+    def __writable():
+        """raises io.UnsupportedOperation if the objects are those of a
+        mapped snapshot, before anything is changed"""
+        if type(FileStorage.__objects) is MappedObjects:
+            raise io.UnsupportedOperation("the snapshot is read-only")
+
+    def import_records(self, cls, records):
+        """creates the objects of cls described by records and saves them
+        at once, returns their number
+
+        records are dictionaries of attributes, e.g. those bulk.read()
+        streams from a file; values are cast to the types attributes()
+        lists and the instances are built from the raw records the way
+        reload() builds them. A record with the id of a stored object
+        replaces that object, as new() does.
+        """
+        name = cls if isinstance(cls, str) else cls.__name__
+        build = self.classes()[name]
+        types = dict(self.attributes()["BaseModel"],
+                     **self.attributes()[name])
+        objs = [build(**bulk.coerce(record, name, types))
+                for record in records]
+        with self.lock:
+            for obj in objs:
+                self.new(obj)
+        self.save()
+        return len(objs)
+
+    def update_where(self, cls, where, values):
+        """sets values on the objects of cls matching where and saves
+        once, returns the number of objects updated
+
+        Args:
+            - cls: class or class name to update
+            - where: conditions as query() takes them
+            - values: dictionary of attributes to set, cast once to the
+              types attributes() lists
+
+        updated_at is set to the same time on every object updated; the
+        id and timestamps cannot be given in values.
+        """
+        name = cls if isinstance(cls, str) else cls.__name__
+        if set(values) & set(self.attributes()["BaseModel"]):
+            raise ValueError("id, created_at and updated_at are kept")
+        values = bulk.cast(values, dict(self.attributes()["BaseModel"],
+                                        **self.attributes()[name]))
+        now = datetime.datetime.now()
+        with self.lock:
+            objs = self.query(name, where)
+            for obj in objs:
+                for attribute, value in values.items():
+                    setattr(obj, attribute, list(value)
+                            if type(value) is list else value)
+                obj.updated_at = now
+        if objs:
+            self.save()
+        return len(objs)
+
+    def destroy_where(self, cls, where, cascade=False):
+        """deletes the objects of cls matching where and saves once,
+        returns the number of objects deleted
+
+        With cascade, the objects referring to a deleted object through
+        a foreign key of cascades() are deleted too, and so on down the
+        tree, each level found through the index of the key.
+        """
+        name = cls if isinstance(cls, str) else cls.__name__
+        cascades = self.cascades()
+        doomed = {}
+        with self.lock:
+            pending = self.query(name, where)
+            while pending:
+                obj = pending.pop()
+                name = type(obj).__name__
+                key = "{}.{}".format(name, obj.id)
+                if key in doomed:
+                    continue
+                doomed[key] = obj
+                if cascade:
+                    for child, attribute in cascades.get(name, ()):
+                        pending.extend(self.lookup(child, attribute,
+                                                   obj.id).values())
+            for obj in doomed.values():
+                self.delete(obj)
+        if doomed:
+            self.save()
+        return len(doomed)
+
+    def export_records(self, cls):
+        """iterates the records of the objects of cls, as to_dict()
+        returns them"""
+        return (obj.to_dict() for obj in self.all(cls).values())
+
+    def begin(self):
+        """starts a transaction
+
+        Until commit() or rollback(), saves write nothing and the changes
+        made to the objects are logged so rollback() can undo them.
+        There is one transaction for all threads.
+        """
+        with FileStorage.lock:
+            if FileStorage.__undo is not None:
+                raise ValueError("a transaction is already open")
+            FileStorage.__undo = UndoLog()
+
+    def commit(self):
+        """ends the transaction and saves its changes at once"""
+        with FileStorage.lock:
+            if FileStorage.__undo is None:
+                raise ValueError("no transaction is open")
+            FileStorage.__undo = None
+        self.save()
+
+    def rollback(self):
+        """ends the transaction, undoing its changes to the objects"""
+        with FileStorage.lock:
+            undo, FileStorage.__undo = FileStorage.__undo, None
+            if undo is None:
+                raise ValueError("no transaction is open")
+            undo.undo(self)
+
+    def flush(self):
+        """writes out the saves deferred by the write-behind or threaded
+        mode"""
+        with FileStorage.__wake:
+            while FileStorage.__written < FileStorage.__requested and \
+                    FileStorage.__writer.is_alive():
+                FileStorage.__wake.wait()
+            error, FileStorage.__error = FileStorage.__error, None
+        if error is not None:
+            raise error
+        with FileStorage.__flush_lock:
+            if FileStorage.__timer is not None:
+                FileStorage.__timer.cancel()
+                FileStorage.__timer = None
+            if FileStorage.__deferred:
+                FileStorage.__deferred = 0
+                self.__write()
+
+    def __request(self):
+        """hands a save over to the writer thread"""
+        with FileStorage.__wake:
+            if FileStorage.__writer is None or \
+                    not FileStorage.__writer.is_alive():
+                FileStorage.__writer = threading.Thread(
+                    target=self.__writer_loop, name="FileStorage writer",
+                    daemon=True)
+                FileStorage.__writer.start()
+            if not FileStorage.__at_exit:
+                atexit.register(self.flush)
+                FileStorage.__at_exit = True
+            FileStorage.__requested += 1
+            FileStorage.__wake.notify_all()
+
+    def __writer_loop(self):
+        """writes whenever saves were requested since the last write
+
+        Saves requested while a write is running are all served by the
+        next one.
+        """
+        while True:
+            with FileStorage.__wake:
+                while FileStorage.__written >= FileStorage.__requested:
+                    FileStorage.__wake.wait()
+                requested = FileStorage.__requested
+            try:
+                self.__write()
+            except Exception as error:
+                FileStorage.__error = error
+            with FileStorage.__wake:
+                FileStorage.__written = requested
+                FileStorage.__wake.notify_all()
+
+    def __defer(self):
+        """records a save, flushing once enough of them piled up"""
+        with FileStorage.__flush_lock:
+            if not FileStorage.__at_exit:
+                atexit.register(self.flush)
+                FileStorage.__at_exit = True
+            FileStorage.__deferred += 1
+            if FileStorage.__deferred >= FileStorage.flush_after:
+                self.flush()
+            elif FileStorage.__timer is None and FileStorage.flush_interval:
+                FileStorage.__timer = threading.Timer(
+                    FileStorage.flush_interval, self.flush)
+                FileStorage.__timer.daemon = True
+                FileStorage.__timer.start()
+
+    def __write(self):
+        """writes the changes out, to the journal or a new snapshot"""
+        if FileStorage.__undo is not None:
+            # the transaction is written out by commit()
+            return
+        with FileStorage.__write_lock:
+            self.__write_locked()
+
+    def __write_locked(self):
+        """writes the changes out, one thread at a time"""
+        if FileStorage.shared:
+            with self.__lock(exclusive=True) as fd:
+                self.__refresh(save=True)
+                changes = FileStorage.__changes
+                self.__store()
+                generation = int(os.read(fd, 20) or 0) + 1
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, b"%020d" % generation)
+                for fnk, fnv in changes.items():
+                    if fnv is None:
+                        FileStorage.__versions.pop(fnk, None)
+                    else:
+                        FileStorage.__versions[fnk] = self.__version(fnv)
+                FileStorage.__seen = self.__signature()
+            return
+        self.__store()
+
+    def __store(self):
+        """writes the changes to the journal or a new snapshot"""
+        if FileStorage.journal:
+            self.__append()
+            if FileStorage.__journal_size >= max(FileStorage.compact_after,
+                                                 len(FileStorage.__objects)):
+                self.compact(background=not FileStorage.shared)
+            return
+        if self.__sharding():
+            if os.path.isfile(FileStorage.__file_path):
+                # the other classes are still in the single file
+                self.migrate()
+            else:
+                self.__store_shards()
+            return
+        shards = self.__shards()
+        self.__check_loaded(shards)
+        with FileStorage.lock:
+            data = self.__dump()
+            changes, FileStorage.__changes = FileStorage.__changes, {}
+        try:
+            self.__replace(FileStorage.__file_path, data)
+        except BaseException:
+            with FileStorage.lock:
+                changes.update(FileStorage.__changes)
+                FileStorage.__changes = changes
+            raise
+        self.__mark(FileStorage.__file_path)
+        self.__drop_journal()
+        self.__drop_shards(shards)
+
+    @staticmethod
+    def __sharding():
+        """tells whether save() and reload() use one file per class"""
+        return FileStorage.sharded and not FileStorage.journal and \
+            not FileStorage.shared
+
+    @staticmethod
+    def __shard(name):
+        """returns the path of the file keeping the objects of class name"""
+        root, ext = os.path.splitext(FileStorage.__file_path)
+        return "{}.{}{}".format(root, name, ext)
+
+    def __shards(self):
+        """returns the paths of the shards of all the classes"""
+        return [self.__shard(name) for name in self.classes()]
+
+    @staticmethod
+    def __mark(path):
+        """records the file at path as read or written here, or as gone"""
+        try:
+            fns = os.stat(path)
+        except FileNotFoundError:
+            FileStorage.__loaded.pop(path, None)
+            return
+        FileStorage.__loaded[path] = (fns.st_ino, fns.st_mtime_ns,
+                                      fns.st_size)
+
+    @staticmethod
+    def __check_loaded(paths):
+        """raises a ValueError if a file at paths was changed since it
+        was last read or written here, as removing it would lose data"""
+        for path in paths:
+            try:
+                fns = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if FileStorage.__loaded.get(path) != (
+                    fns.st_ino, fns.st_mtime_ns, fns.st_size):
+                raise ValueError(
+                    path + " was changed since it was read, reload() first")
+
+    @staticmethod
+    def __drop_shards(paths):
+        """removes the shards at paths, folded into the single file"""
+        for path in paths:
+            if os.path.isfile(path):
+                os.remove(path)
+                FileStorage.__mark(path)
+
+    def __store_shards(self, names=None):
+        """rewrites the shards of the classes named in names, by default
+        those of the objects changed since the last save
+
+        The contents are taken under the lock and written by a thread
+        per shard; the shard of a class left without objects is removed.
+        """
+        with FileStorage.lock:
+            changes, FileStorage.__changes = FileStorage.__changes, {}
+            if names is None:
+                names = {fnk.split(".", 1)[0] for fnk in changes}
+            index = self.__class_index()
+            shards = [(self.__shard(name), self.__dump(list(index[name]))
+                       if index.get(name) else None) for name in names]
+        try:
+            with ThreadPoolExecutor(max(len(shards), 1)) as pool:
+                list(pool.map(self.__write_shard, shards))
+        except BaseException:
+            with FileStorage.lock:
+                changes.update(FileStorage.__changes)
+                FileStorage.__changes = changes
+            raise
+
+    @staticmethod
+    def __write_shard(shard):
+        """writes a (path, contents) shard, removing it if contents is
+        None"""
+        path, fns = shard
+        if fns is not None:
+            FileStorage.__replace(path, fns)
+        elif os.path.isfile(path):
+            os.remove(path)
+        FileStorage.__mark(path)
+
+    def migrate(self):
+        """splits the single file into shards for the sharded mode
+
+        Writes the shard of every class from __objects, then removes the
+        single file reload() read them from. Raises a ValueError if the
+        single file was changed since, as its records were not read.
+        """
+        if not self.__sharding():
+            raise ValueError("migrate() needs the sharded mode")
+        self.__check_loaded([FileStorage.__file_path])
+        self.__store_shards(self.classes())
+        if os.path.isfile(FileStorage.__file_path):
+            os.remove(FileStorage.__file_path)
+            self.__mark(FileStorage.__file_path)
+
+    def __dump(self, keys=None):
+        """returns the contents of the file for __objects, or only for
+        the objects at keys
+
+        In JSON, the encoded "key": {...} fragment of every object is
+        cached until new(), delete() or touch() invalidates it, so only
+        the objects changed since the last dump get encoded again.
+        Objects holding lists or dicts, which can change in place, are
+        encoded every time; other changes that bypass setattr, like
+        writing into __dict__, must be followed by touch(). Callers hold
+        FileStorage.lock, which makes the contents a consistent snapshot.
+        """
+        objects = FileStorage.__objects
+        if keys is None:
+            items = list(dict.items(objects))
+        else:
+            items = [(fnk, dict.__getitem__(objects, fnk)) for fnk in keys]
+        fns = serializer_for(FileStorage.__file_path, FileStorage.format)
+        if fns.name != "json":
+            return fns.dumps({
+                fnk: fnv if type(fnv) is dict else fns.record(fnv)
+                for fnk, fnv in items})
+        fragments = FileStorage.__fragments
+        parts = []
+        for fnk, fnv in items:
+            cached = fragments.get(fnk)
+            if cached is None or cached[0] is not fnv:
+                fnd = fnv if type(fnv) is dict else fnv.to_dict()
+                cached = (fnv, json.dumps(fnk) + ": " + json.dumps(fnd))
+                for value in fnd.values():
+                    if type(value) is list or type(value) is dict:
+                        break
+                else:
+                    fragments[fnk] = cached
+            parts.append(cached[1])
+        if keys is None and len(fragments) > len(parts):
+            # drop fragments of objects no longer in __objects
+            FileStorage.__fragments = {
+                fnk: fragments[fnk] for fnk in FileStorage.__objects}
+        return "{" + ", ".join(parts) + "}"
+
+    def __append(self):
+        """appends the changes since the last save to the journal"""
+        lines = []
+        with FileStorage.lock:
+            changes, FileStorage.__changes = FileStorage.__changes, {}
+            for fnk, fnv in changes.items():
+                if fnv is None:
+                    record = {"op": "delete", "key": fnk}
+                else:
+                    record = {"op": "put", "key": fnk, "obj": fnv.to_dict()}
+                lines.append(json.dumps(record) + "\n")
+        if not lines:
+            return
+        with open(FileStorage.__file_path + ".log", "a",
+                  encoding="utf-8") as fnf:
+            fnf.write("".join(lines))
+            if FileStorage.durability == "durable":
+                fnf.flush()
+                os.fsync(fnf.fileno())
+        FileStorage.__journal_size += len(lines)
+
+    def compact(self, background=True):
+        """folds the journal into a new snapshot of __objects
+
+        The snapshot is taken here, while the file is written from a
+        background thread unless background is False. Shards left by the
+        sharded mode are folded into it too.
+        """
+        shards = self.__shards()
+        self.__check_loaded(shards)
+        if FileStorage.__compactor and FileStorage.__compactor.is_alive():
+            if not background:
+                FileStorage.__compactor.join()
+            else:
+                return
+        self.__append()
+        log = FileStorage.__file_path + ".log"
+        if os.path.isfile(log + ".1"):
+            # an earlier compaction never finished, fold it all right now
+            background = False
+        elif os.path.isfile(log):
+            os.replace(log, log + ".1")
+        FileStorage.__journal_size = 0
+        with FileStorage.lock:
+            args = (FileStorage.__file_path, self.__dump(), shards)
+        if not background:
+            self.__write_snapshot(*args)
+            self.__drop_journal()
+            return
+        FileStorage.__compactor = threading.Thread(
+            target=self.__write_snapshot, args=args)
+        FileStorage.__compactor.start()
+
+    @staticmethod
+    def __write_snapshot(path, fns, shards=()):
+        """replaces the snapshot at path and drops the folded journal and
+        shards"""
+        FileStorage.__replace(path, fns)
+        FileStorage.__mark(path)
+        if os.path.isfile(path + ".log.1"):
+            os.remove(path + ".log.1")
+        FileStorage.__drop_shards(shards)
+
+    @staticmethod
+    def __replace(path, fns, durability=None):
+        """writes fns to path as durably as durability asks for
+
+        Unless durability is "fast", fns goes to a temporary file next
+        to path that is then renamed over it, so a crash leaves either
+        the old or the new file behind; "durable" also fsyncs the file
+        before and its directory after the rename. durability defaults
+        to FileStorage.durability.
+        """
+        durability = durability or FileStorage.durability
+        FileStorage.__check_durability(durability)
+        mode = "wb" if isinstance(fns, bytes) else "w"
+        encoding = None if isinstance(fns, bytes) else "utf-8"
+        if durability == "fast":
+            with open(path, mode, encoding=encoding) as fnf:
+                fnf.write(fns)
+            return
+        tmp = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+        try:
+            with open(tmp, mode, encoding=encoding) as fnf:
+                fnf.write(fns)
+                if durability == "durable":
+                    fnf.flush()
+                    os.fsync(fnf.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.isfile(tmp):
+                os.remove(tmp)
+            raise
+        if durability == "durable":
+            fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def snapshot(self):
+        """writes the snapshot the mapped mode reads to <file_path>.snap
+
+        The snapshot is always renamed into place, never overwritten, as
+        readers still mapping the previous one would crash otherwise.
+        """
+        objects = FileStorage.__objects
+        if type(objects) is MappedObjects:
+            items = objects.items()
+        else:
+            items = list(dict.items(objects))
+        records = {fnk: fnv if type(fnv) is dict else fnv.to_dict()
+                   for fnk, fnv in items}
+        durability = FileStorage.durability
+        self.__replace(FileStorage.__file_path + ".snap",
+                       mapped_objects.dumps(records, self.__source()),
+                       "atomic" if durability == "fast" else durability)
+
+    def __source(self):
+        """returns the signature of the files a snapshot is taken from"""
+        path = FileStorage.__file_path
+        return mapped_objects.signature(
+            [path, path + ".log", path + ".log.1"] + self.__shards())
+
+    @contextlib.contextmanager
+    def __lock(self, exclusive=False):
+        """holds the lock on <file_path>.lock shared by all processes"""
+        fd = os.open(FileStorage.__file_path + ".lock",
+                     os.O_RDWR | os.O_CREAT)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive
+                            else fcntl.LOCK_SH)
+            yield fd
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def __signature():
+        """returns what changes whenever a process writes the files
+
+        That is the generation the writers count in <file_path>.lock,
+        then the inode, mtime and size of the files, which also catch
+        writers not using the shared mode.
+        """
+        try:
+            with open(FileStorage.__file_path + ".lock", "rb") as fnf:
+                signature = [fnf.read()]
+        except FileNotFoundError:
+            signature = [b""]
+        for path in (FileStorage.__file_path,
+                     FileStorage.__file_path + ".log",
+                     FileStorage.__file_path + ".log.1"):
+            try:
+                fns = os.stat(path)
+            except FileNotFoundError:
+                signature.append(None)
+                continue
+            signature.append((fns.st_ino, fns.st_mtime_ns, fns.st_size))
+        return tuple(signature)
+
+    @staticmethod
+    def __version(fnv):
+        """returns the updated_at of a raw record or instance as a str"""
+        if type(fnv) is dict:
+            fnu = fnv.get("updated_at")
+        else:
+            fnu = getattr(fnv, "updated_at", None)
+        return fnu.isoformat() if isinstance(fnu, datetime.datetime) else fnu
+
+    def __check(self):
+        """picks up the writes of other processes in shared mode"""
+        if FileStorage.shared and \
+                self.__signature() != FileStorage.__seen:
+            with self.__lock():
+                self.__refresh()
+
+    def __refresh(self, save=False):
+        """merges the files into __objects if they changed since read
+
+        Objects changed here since the last save are kept. When saving,
+        those another process changed as well are replaced by its
+        version and reported with a ConflictError; until then the files
+        are not taken as read, so the save reads them again.
+        """
+        signature = self.__signature()
+        if signature == FileStorage.__seen:
+            return
+        records = self.__read()
+        versions = FileStorage.__versions
+        changes = FileStorage.__changes
+        objects = FileStorage.__objects
+        conflicts = [fnk for fnk in changes if fnk in versions and
+                     self.__version(records.get(fnk, {})) != versions[fnk]]
+        merged = {}
+        for fnk, fnv in records.items():
+            version = self.__version(fnv)
+            if fnk in changes:
+                continue
+            if versions.get(fnk, False) == version and fnk in objects:
+                fnv = dict.__getitem__(objects, fnk)
+            merged[fnk] = fnv
+            versions[fnk] = version
+        for fnk in list(versions):
+            if fnk not in records and fnk not in changes:
+                del versions[fnk]
+        for fnk, fnv in changes.items():
+            if fnv is not None:
+                merged[fnk] = fnv
+        if FileStorage.lazy:
+            merged = LazyObjects(merged, self.__build)
+        else:
+            merged = {fnk: self.__build(fnv) if type(fnv) is dict else fnv
+                      for fnk, fnv in merged.items()}
+        FileStorage.__objects = merged
+        if conflicts and not save:
+            # left for the save to report
+            return
+        FileStorage.__seen = signature
+        if not conflicts:
+            return
+        for fnk in conflicts:
+            del changes[fnk]
+            FileStorage.__fragments.pop(fnk, None)
+            if fnk in records:
+                merged[fnk] = self.__build(records[fnk])
+                versions[fnk] = self.__version(records[fnk])
+            else:
+                merged.pop(fnk, None)
+                versions.pop(fnk, None)
+        raise ConflictError(conflicts)
+
+    def __drop_journal(self):
+        """removes journal files already folded into the snapshot"""
+        for path in (FileStorage.__file_path + ".log",
+                     FileStorage.__file_path + ".log.1"):
+            if os.path.isfile(path):
+                os.remove(path)
+        FileStorage.__journal_size = 0
 
     def classes(self):
-        """Returns a dictionary of valid classes and their references"""
-        from models.base_model import BaseModel
-        from models.user import User
-        from models.state import State
-        from models.city import City
-        from models.amenity import Amenity
-        from models.place import Place
-        from models.review import Review
-
-        classes = {"BaseModel": BaseModel,
-                   "User": User,
-                   "State": State,
-                   "City": City,
-                   "Amenity": Amenity,
-                   "Place": Place,
-                   "Review": Review}
-        return classes
+        """Returns a dictionary of valid classes and their references
+
+        The models add themselves to models.base_model.registry when
+        they are defined; the dictionary is cached until a model is
+        defined, redefined or removed there, or compact_models changes.
+        Callers must not change it.
+        """
+        registry = FileStorage.__registry
+        if registry is None:
+            registry = FileStorage.__registry = FileStorage.__load_models()
+        key = (registry.version, FileStorage.compact_models)
+        if FileStorage.__classes[0] != key:
+            classes = dict(registry)
+            if FileStorage.compact_models:
+                from models.base_model import compact_class
+                classes = {name: compact_class(cls)
+                           for name, cls in classes.items()}
+            FileStorage.__classes = (key, classes)
+        return FileStorage.__classes[1]
+
+    @staticmethod
+    def __load_models():
+        """defines the models of the package and returns the registry"""
+        from models.base_model import registry
+        import models.user  # noqa: F401
+        import models.state  # noqa: F401
+        import models.city  # noqa: F401
+        import models.amenity  # noqa: F401
+        import models.place  # noqa: F401
+        import models.review  # noqa: F401
+        return registry
 
     def reload(self):
         """Reloads the stored objects"""
-        if not os.path.isfile(FileStorage.__file_path):
+        snap = FileStorage.__file_path + ".snap"
+        if FileStorage.mapped and os.path.isfile(snap):
+            objects = MappedObjects(snap, self.__build)
+            if objects.source == self.__source():
+                FileStorage.__objects = objects
+                FileStorage.__changes = {}
+                FileStorage.__fragments = {}
+                return
+            # the files were written since: read them instead
+            objects.close()
+        if FileStorage.shared:
+            with self.__lock():
+                FileStorage.__seen = self.__signature()
+                obj_dict = self.__read()
+            FileStorage.__versions = {fnk: self.__version(fnv)
+                                      for fnk, fnv in obj_dict.items()}
+        elif not any(os.path.isfile(fnp) for fnp in self.__shards() + [
+                FileStorage.__file_path + fns
+                for fns in ("", ".log", ".log.1")]):
             return
-        with open(FileStorage.__file_path, "r", encoding="utf-8") as fnf:
-            obj_dict = json.load(fnf)
-            obj_dict = {fnk: self.classes()[fnv["__class__"]](**fnv)
+        else:
+            obj_dict = self.__read()
+        if FileStorage.lazy:
+            obj_dict = LazyObjects(obj_dict, self.__build)
+        else:
+            obj_dict = {fnk: self.__build(fnv) if type(fnv) is dict else fnv
                         for fnk, fnv in obj_dict.items()}
-            # TODO: should this overwrite or insert?
-            FileStorage.__objects = obj_dict
+        # TODO: should this overwrite or insert?
+        FileStorage.__objects = obj_dict
+        FileStorage.__changes = {}
+        FileStorage.__fragments = {}
+
+    def __read(self):
+        """returns the raw records of the snapshot, its shards and its
+        journal
+
+        Records of the snapshot come back as instances already when
+        reload_workers built them.
+        """
+        obj_dict = {}
+        if os.path.isfile(FileStorage.__file_path):
+            # marked first: a write after it is taken as not read
+            self.__mark(FileStorage.__file_path)
+            obj_dict = self.__read_parallel()
+            if obj_dict is None:
+                obj_dict = serializers.read(FileStorage.__file_path,
+                                            FileStorage.format)
+        shards = [fnp for fnp in self.__shards() if os.path.isfile(fnp)]
+        if shards:
+            for fnp in shards:
+                self.__mark(fnp)
+            with ThreadPoolExecutor(len(shards)) as pool:
+                for records in pool.map(
+                        lambda fnp: serializers.read(fnp, FileStorage.format),
+                        shards):
+                    obj_dict.update(records)
+        FileStorage.__journal_size = 0
+        for path in (FileStorage.__file_path + ".log.1",
+                     FileStorage.__file_path + ".log"):
+            FileStorage.__journal_size += self.__replay(path, obj_dict)
+        return obj_dict
+
+    def __read_parallel(self):
+        """returns the instances of the JSON snapshot, built by a pool of
+        reload_workers processes, or None when that cannot be done
+
+        The file is cut where a record ends and the next key starts,
+        which is the only place `}, "<class name>.` can appear since
+        quotes are escaped inside strings. Each worker decodes and builds
+        the records of one piece; when the pool fails, the caller reads
+        the file serially.
+        """
+        workers = FileStorage.reload_workers
+        if workers < 2 or FileStorage.lazy or FileStorage.compact_models \
+                or multiprocessing.parent_process() is not None or \
+                self.__importing():
+            return None
+        if serializer_for(FileStorage.__file_path,
+                          FileStorage.format).name != "json":
+            return None
+        with open(FileStorage.__file_path, "r", encoding="utf-8") as fnf:
+            data = fnf.read()
+        boundary = re.compile(r'\}, "(?:' + "|".join(
+            map(re.escape, self.classes())) + r')\.')
+        body = data.strip()[1:-1]
+        cuts = [0]
+        for i in range(1, workers):
+            match = boundary.search(body, max(cuts[-1], len(body) * i //
+                                              workers))
+            if match is None:
+                break
+            cuts.append(match.start() + 1)
+        if len(cuts) < 2:
+            return None
+        cuts.append(len(body))
+        chunks = [body[start:end].lstrip(", ")
+                  for start, end in zip(cuts, cuts[1:])]
+        try:
+            with ProcessPoolExecutor(len(chunks)) as pool:
+                parts = list(pool.map(_build_chunk, chunks))
+        except Exception:
+            return None
+        obj_dict = {}
+        for part in parts:
+            obj_dict.update(part)
+        return obj_dict
+
+    @staticmethod
+    def __importing():
+        """tells whether the models package is still being imported
+
+        The import holds the lock of the package until it is done, and
+        the pool pickling _build_chunk would wait for it forever.
+        """
+        spec = getattr(sys.modules.get("models"), "__spec__", None)
+        return getattr(spec, "_initializing", False)
+
+    def __build(self, fnv):
+        """returns the instance described by the raw record fnv"""
+        return self.classes()[fnv["__class__"]](**fnv)
+
+    def __replay(self, path, obj_dict):
+        """applies the journal records in path to obj_dict"""
+        count = 0
+        if not os.path.isfile(path):
+            return count
+        with open(path, "rb+") as fnf:
+            for line in iter(fnf.readline, b""):
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError(line)
+                    record = json.loads(line)
+                except ValueError:
+                    # torn tail of an interrupted append, cut it off
+                    fnf.seek(-len(line), os.SEEK_CUR)
+                    fnf.truncate()
+                    break
+                if record["op"] == "put":
+                    obj_dict[record["key"]] = record["obj"]
+                else:
+                    obj_dict.pop(record["key"], None)
+                count += 1
+        return count
+
+    def indexes(self):
+        """Returns the indexed foreign-key attributes for classname"""
+        return {classname: tuple(fnk for fnk, fnt in attributes.items()
+                                 if fnk.endswith("_id") and fnt is str)
+                for classname, attributes in self.attributes().items()}
+
+    def cascades(self):
+        """Returns the (class name, foreign key) pairs referring to each
+        class name, e.g. ("City", "state_id") for State, as listed by
+        FileStorage.cascading"""
+        indexes = self.indexes()
+        cascades = {}
+        for parent, child, attribute in FileStorage.cascading:
+            if attribute in indexes.get(child, ()):
+                cascades[parent] = cascades.get(parent, ()) + (
+                    (child, attribute),)
+        return cascades
 
     def attributes(self):
-        """Returns the valid attributes and their types for classname"""
-        attributes = {
-            "BaseModel":
-                     {"id": str,
-                      "created_at": datetime.datetime,
-                      "updated_at": datetime.datetime},
-            "User":
-                     {"email": str,
-                      "password": str,
-                      "first_name": str,
-                      "last_name": str},
-            "State":
-                     {"name": str},
-            "City":
-                     {"state_id": str,
-                      "name": str},
-            "Amenity":
-                     {"name": str},
-            "Place":
-                     {"city_id": str,
-                      "user_id": str,
-                      "name": str,
-                      "description": str,
-                      "number_rooms": int,
-                      "number_bathrooms": int,
-                      "max_guest": int,
-                      "price_by_night": int,
-                      "latitude": float,
-                      "longitude": float,
-                      "amenity_ids": list},
-            "Review":
-            {"place_id": str,
-                         "user_id": str,
-                         "text": str}
-        }
-        return attributes
+        """Returns the valid attributes and their types for classname
+
+        The attributes of a model are the public class attributes it
+        defines, typed after their defaults; those of BaseModel are set
+        by its __init__. The dictionary is cached like classes().
+        """
+        registry = FileStorage.__registry
+        if registry is None:
+            registry = FileStorage.__registry = FileStorage.__load_models()
+        if FileStorage.__attributes[0] != registry.version:
+            attributes = {"BaseModel": {"id": str,
+                                        "created_at": datetime.datetime,
+                                        "updated_at": datetime.datetime}}
+            for name, cls in registry.items():
+                if name != "BaseModel":
+                    attributes[name] = {
+                        fnk: type(fnv) for fnk, fnv in vars(cls).items()
+                        if not fnk.startswith("_") and not callable(fnv)}
+            FileStorage.__attributes = (registry.version, attributes)
+        return FileStorage.__attributes[1]
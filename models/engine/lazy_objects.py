@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""Module for the LazyObjects dictionary."""
+
+
+class LazyObjects(dict):
+
+    """Dictionary of stored objects built on first access
+
+    Values start out as the raw records read from the file and are
+    replaced by the instance load(record) returns the first time they
+    are looked up. Keys, len() and membership never build anything.
+    """
+
+    def __init__(self, records, load):
+        """Initializes the dictionary
+
+        Args:
+            - records: dict of key-raw record pairs
+            - load: callable building an instance from a raw record
+        """
+        super().__init__(records)
+        self.__load = load
+
+    def is_loaded(self, key):
+        """tells whether the instance for key was built already"""
+        return type(dict.__getitem__(self, key)) is not dict
+
+    def raw_items(self):
+        """iterates (key, instance or raw record) without building"""
+        return dict.items(self)
+
+    def __getitem__(self, key):
+        """returns the instance for key, building it if needed"""
+        value = dict.__getitem__(self, key)
+        if type(value) is dict:
+            value = self.__load(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def __iter__(self):
+        """iterates the keys
+
+        Overriding it keeps dict(self) and {**self} from copying the raw
+        records, as CPython only takes its fast path for plain iteration.
+        """
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        """returns the instance for key or default"""
+        if key not in self:
+            return default
+        return self[key]
+
+    def pop(self, key, *default):
+        """removes key and returns its instance"""
+        if key not in self:
+            return dict.pop(self, key, *default)
+        value = self[key]
+        dict.__delitem__(self, key)
+        return value
+
+    def setdefault(self, key, default=None):
+        """returns the instance for key, inserting default if missing"""
+        if key not in self:
+            dict.__setitem__(self, key, default)
+        return self[key]
+
+    def values(self):
+        """iterates the instances"""
+        return (self[key] for key in list(dict.keys(self)))
+
+    def items(self):
+        """iterates (key, instance) pairs"""
+        return ((key, self[key]) for key in list(dict.keys(self)))
+
+    def copy(self):
+        """returns a LazyObjects sharing the same records"""
+        return LazyObjects(dict.items(self), self.__load)
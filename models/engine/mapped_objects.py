@@ -0,0 +1,200 @@
+#!/usr/bin/python3
+"""Module for read-only snapshots and the MappedObjects dictionary.
+
+A snapshot holds every record encoded in JSON, after a header and
+before an index sorted on the keys:
+
+    header   b"HBNBMAP2", number of records, offset of the index and
+             the signature() of the files the records were read from
+    records  key bytes followed by record bytes, for every record
+    index    (offset, key length, record length) for every record
+
+Readers mmap the file, so they share its pages through the page cache
+and only decode the records they look up. Writes a snapshot of a
+storage file when run as a script:
+    python3 -m models.engine.mapped_objects file.json file.json.snap
+"""
+import bisect
+import hashlib
+import json
+import os
+import mmap
+import struct
+import sys
+from collections.abc import MutableMapping
+from datetime import datetime
+from models.engine import serializers
+
+MAGIC = b"HBNBMAP2"
+HEADER = struct.Struct("<8sQQ16s")
+ENTRY = struct.Struct("<QII")
+
+
+def signature(paths):
+    """returns a digest of the inode, mtime and size of the files at
+    paths that exist, which changes whenever one of them is written"""
+    stats = []
+    for path in paths:
+        try:
+            fns = os.stat(path)
+        except FileNotFoundError:
+            continue
+        stats.append((fns.st_ino, fns.st_mtime_ns, fns.st_size))
+    return hashlib.blake2b(repr(stats).encode("utf-8"),
+                           digest_size=16).digest()
+
+
+def dumps(records, source=bytes(16)):
+    """returns the snapshot of the key -> record dictionary records
+
+    Args:
+        - records: dictionary of the records
+        - source: signature() of the files records were read from
+    """
+    keys = sorted(fnk.encode("utf-8") for fnk in records)
+    parts = []
+    entries = []
+    offset = HEADER.size
+    for fnk in keys:
+        record = json.dumps(records[fnk.decode("utf-8")],
+                            default=datetime.isoformat).encode("utf-8")
+        entries.append(ENTRY.pack(offset, len(fnk), len(record)))
+        parts += (fnk, record)
+        offset += len(fnk) + len(record)
+    return b"".join([HEADER.pack(MAGIC, len(keys), offset, source)] +
+                    parts + entries)
+
+
+class _Keys:
+
+    """Sequence of the keys of a snapshot, as bytes, for bisect"""
+
+    def __init__(self, data, count, index):
+        """Initializes the sequence"""
+        self.__data = data
+        self.__count = count
+        self.__index = index
+
+    def entry(self, i):
+        """returns the (offset, key length, record length) of record i"""
+        return ENTRY.unpack_from(self.__data, self.__index + i * ENTRY.size)
+
+    def __len__(self):
+        """returns the number of keys"""
+        return self.__count
+
+    def __getitem__(self, i):
+        """returns key i"""
+        offset, size, _ = self.entry(i)
+        return self.__data[offset:offset + size]
+
+
+class MappedObjects(MutableMapping):
+
+    """Dictionary of stored objects read from a mapped snapshot
+
+    Looking a key up bisects the index of the snapshot and builds the
+    instance load(record) returns, which is then kept. Objects added or
+    removed afterwards only change the dictionary, never the snapshot.
+    source is the signature() of the files the snapshot was taken from.
+    """
+
+    def __init__(self, path, load):
+        """Initializes the dictionary
+
+        Args:
+            - path: path of the snapshot
+            - load: callable building an instance from a raw record
+        """
+        with open(path, "rb") as fnf:
+            self.__data = mmap.mmap(fnf.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, index, self.source = HEADER.unpack_from(self.__data)
+        if magic != MAGIC:
+            self.__data.close()
+            raise ValueError("{} is not a snapshot".format(path))
+        self.__keys = _Keys(self.__data, count, index)
+        self.__load = load
+        self.__objects = {}
+        self.__added = {}
+        self.__deleted = set()
+
+    def __find(self, key):
+        """returns the position of key in the snapshot, or None"""
+        fnk = key.encode("utf-8")
+        i = bisect.bisect_left(self.__keys, fnk)
+        if i < len(self.__keys) and self.__keys[i] == fnk:
+            return i
+        return None
+
+    def __record(self, i):
+        """returns record i of the snapshot, decoded"""
+        offset, size, length = self.__keys.entry(i)
+        return json.loads(self.__data[offset + size:offset + size + length])
+
+    def raw(self, key):
+        """returns the instance for key if built, otherwise its record"""
+        if key in self.__objects:
+            return self.__objects[key]
+        i = self.__find(key) if key not in self.__deleted else None
+        if i is None:
+            raise KeyError(key)
+        return self.__record(i)
+
+    def is_loaded(self, key):
+        """tells whether the instance for key was built already"""
+        return key in self.__objects
+
+    def __getitem__(self, key):
+        """returns the instance for key, building it if needed"""
+        value = self.raw(key)
+        if type(value) is dict:
+            value = self.__load(value)
+            self.__objects[key] = value
+        return value
+
+    def __contains__(self, key):
+        """tells whether key is stored, without building it"""
+        return key in self.__objects or (
+            key not in self.__deleted and self.__find(key) is not None)
+
+    def __setitem__(self, key, value):
+        """stores value at key"""
+        if key not in self.__objects and self.__find(key) is None:
+            self.__added[key] = None
+        self.__objects[key] = value
+        self.__deleted.discard(key)
+
+    def __delitem__(self, key):
+        """removes key"""
+        if key not in self:
+            raise KeyError(key)
+        self.__objects.pop(key, None)
+        if key in self.__added:
+            del self.__added[key]
+        else:
+            self.__deleted.add(key)
+
+    def __iter__(self):
+        """iterates the keys, those of the snapshot first"""
+        for i in range(len(self.__keys)):
+            key = self.__keys[i].decode("utf-8")
+            if key not in self.__deleted:
+                yield key
+        yield from list(self.__added)
+
+    def __len__(self):
+        """returns the number of keys"""
+        return len(self.__keys) - len(self.__deleted) + len(self.__added)
+
+    def close(self):
+        """unmaps the snapshot"""
+        self.__data.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: {} <source> <snapshot>".format(sys.argv[0]))
+        sys.exit(1)
+    with open(sys.argv[2], "wb") as fnf:
+        fnf.write(dumps(serializers.read(sys.argv[1]),
+                        signature([sys.argv[1]])))
@@ -0,0 +1,135 @@
+#!/usr/bin/python3
+"""Module for the file formats FileStorage can write.
+
+A serializer turns the key -> record dictionary of the stored objects
+into the contents of a file and back. Records are the dictionaries
+to_dict() returns, except that created_at and updated_at may be kept as
+datetime objects by the formats able to store them natively.
+
+Converts a file between formats when run as a script:
+    python3 -m models.engine.serializers file.json file.pickle
+"""
+import json
+import os
+import pickle
+import sys
+from datetime import datetime
+
+
+class JSONSerializer:
+
+    """The default JSON format"""
+    name = "json"
+    extensions = (".json",)
+    binary = False
+
+    def record(self, obj):
+        """returns the record of obj"""
+        return obj.to_dict()
+
+    def dumps(self, records):
+        """returns the file contents for records"""
+        return json.dumps(records, default=datetime.isoformat)
+
+    def loads(self, data):
+        """returns the records stored in data"""
+        return json.loads(data)
+
+
+class PickleSerializer:
+
+    """Pickle protocol 5, keeping datetimes as datetime objects
+
+    Only load files written by a trusted process: unpickling runs
+    whatever code the file asks for.
+    """
+    name = "pickle"
+    extensions = (".pickle", ".pkl")
+    binary = True
+
+    def record(self, obj):
+        """returns the record of obj"""
+        fn_dict = obj.__dict__.copy()
+        fn_dict["__class__"] = type(obj).__name__
+        return fn_dict
+
+    def dumps(self, records):
+        """returns the file contents for records"""
+        native = {}
+        for fnk, fnv in records.items():
+            if type(fnv.get("created_at")) is str or \
+                    type(fnv.get("updated_at")) is str:
+                fnv = dict(fnv)
+                for key in ("created_at", "updated_at"):
+                    if type(fnv.get(key)) is str:
+                        fnv[key] = datetime.fromisoformat(fnv[key])
+            native[fnk] = fnv
+        return pickle.dumps(native, protocol=5)
+
+    def loads(self, data):
+        """returns the records stored in data"""
+        return pickle.loads(data)
+
+
+serializers = {fns.name: fns for fns in (JSONSerializer(),
+                                         PickleSerializer())}
+
+
+def serializer_for(path, name=None):
+    """returns the serializer called name, or the one for path's extension
+
+    Files with an unknown extension are read and written as JSON, or in
+    format name. Raises a ValueError if name is not a format of
+    serializers, or if the extension of path is that of another format.
+    """
+    if name is not None and name not in serializers:
+        raise ValueError("unknown format {}, not one of {}".format(
+            name, ", ".join(serializers)))
+    extension = os.path.splitext(path)[1].lower()
+    for fns in serializers.values():
+        if extension in fns.extensions:
+            if name is not None and name != fns.name:
+                raise ValueError("{} is a {} file, not {}".format(
+                    path, fns.name, name))
+            return fns
+    return serializers["json" if name is None else name]
+
+
+def read(path, name=None):
+    """returns the records stored in the file at path
+
+    Raises a ValueError if the file is not in the format it should be.
+    """
+    fns = serializer_for(path, name)
+    try:
+        if fns.binary:
+            with open(path, "rb") as fnf:
+                return fns.loads(fnf.read())
+        with open(path, "r", encoding="utf-8") as fnf:
+            return fns.loads(fnf.read())
+    except (ValueError, EOFError, pickle.UnpicklingError) as e:
+        raise ValueError("{} is not a {} file: {}".format(
+            path, fns.name, e)) from e
+
+
+def write(path, records, name=None):
+    """writes records to the file at path"""
+    data = serializer_for(path, name).dumps(records)
+    if isinstance(data, bytes):
+        with open(path, "wb") as fnf:
+            fnf.write(data)
+    else:
+        with open(path, "w", encoding="utf-8") as fnf:
+            fnf.write(data)
+
+
+def convert(source, target):
+    """rewrites the file at source in the format of target"""
+    write(target, read(source))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: {} <source> <target>".format(sys.argv[0]))
+        sys.exit(1)
+    convert(sys.argv[1], sys.argv[2])
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""Module for the UndoLog class."""
+
+
+class UndoLog:
+
+    """Log of the changes made to the objects of a storage engine during
+    a transaction, in order, so they can be undone
+
+    The engines record into it from new(), delete() and touch(), the
+    latter getting the attribute before it is set: the log keeps the
+    value it had, or that it was not set on the instance.
+    """
+
+    def __init__(self):
+        """Initializes an empty log"""
+        self.__entries = []
+
+    def __len__(self):
+        """returns the number of changes logged"""
+        return len(self.__entries)
+
+    def new(self, obj, previous=None):
+        """logs that obj was added, replacing previous if given"""
+        self.__entries.append(("new", obj, previous))
+
+    def delete(self, obj):
+        """logs that obj was removed"""
+        self.__entries.append(("delete", obj, None))
+
+    def set(self, obj, attribute):
+        """logs the value attribute of obj has before it is set"""
+        fnd = obj.__dict__
+        if attribute in fnd:
+            self.__entries.append(("set", obj, (attribute, fnd[attribute])))
+        else:
+            self.__entries.append(("unset", obj, attribute))
+
+    def undo(self, storage):
+        """undoes the logged changes on storage, latest first
+
+        The engine must no longer record into this log.
+        """
+        for action, obj, fnv in reversed(self.__entries):
+            if action == "new":
+                storage.delete(obj)
+                if fnv is not None:
+                    storage.new(fnv)
+            elif action == "delete":
+                storage.new(obj)
+            elif action == "set":
+                setattr(obj, *fnv)
+            else:
+                storage.touch(obj, fnv, None)
+                try:
+                    object.__delattr__(obj, fnv)
+                except AttributeError:
+                    # kept in the extra dict of a compact model
+                    obj._extra.pop(fnv, None)
+        self.__entries = []
@@ -8,8 +8,125 @@ import datetime
 from unittest.mock import patch
 import sys
 from io import StringIO
+import random
 import re
 import os
+import json
+import shutil
+import subprocess
+import tempfile
+from models import storage
+
+
+class LegacyCommand(HBNBCommand):
+
+    """The console as it parsed commands before the precompiled parser,
+    with one regex per step and commands re-assembled as strings."""
+
+    def default(self, line):
+        """Catch commands if nothing else matches then."""
+        match = re.search(r"^(\w*)\.(\w+)(?:\(([^)]*)\))$", line)
+        if not match:
+            print("** unknown syntax **")
+            return
+        classname, method, args = match.groups()
+        if method in ("where", "update_where", "destroy_where"):
+            getattr(self, method)(classname, args)
+            return
+        match_uid_and_args = re.search('^"([^"]*)"(?:, (.*))?$', args)
+        if match_uid_and_args:
+            uid = match_uid_and_args.group(1)
+            attr_or_dict = match_uid_and_args.group(2)
+        else:
+            uid = args
+            attr_or_dict = False
+        attr_and_value = ""
+        if method == "update" and attr_or_dict:
+            match_dict = re.search('^({.*})$', attr_or_dict)
+            if match_dict:
+                self.update_dict(classname, uid, match_dict.group(1))
+                return
+            match_attr_and_value = re.search(
+                '^(?:"([^"]*)")?(?:, (.*))?$', attr_or_dict)
+            if match_attr_and_value:
+                attr_and_value = (match_attr_and_value.group(
+                    1) or "") + " " + (match_attr_and_value.group(2) or "")
+        self.onecmd(
+            method + " " + classname + " " + uid + " " + attr_and_value)
+
+    def do_show(self, line):
+        """Prints the string representation of an instance."""
+        if line == "" or line is None:
+            print("** class name missing **")
+        else:
+            words = line.split(' ')
+            if words[0] not in storage.classes():
+                print("** class doesn't exist **")
+            elif len(words) < 2:
+                print("** instance id missing **")
+            else:
+                key = "{}.{}".format(words[0], words[1])
+                if key not in storage.all():
+                    print("** no instance found **")
+                else:
+                    print(storage.all()[key])
+
+    def do_destroy(self, line):
+        """Deletes an instance based on the class name and id."""
+        if line == "" or line is None:
+            print("** class name missing **")
+        else:
+            words = line.split(' ')
+            if words[0] not in storage.classes():
+                print("** class doesn't exist **")
+            elif len(words) < 2:
+                print("** instance id missing **")
+            else:
+                key = "{}.{}".format(words[0], words[1])
+                if key not in storage.all():
+                    print("** no instance found **")
+                else:
+                    storage.delete(storage.all()[key])
+                    storage.save()
+
+    def do_update(self, line):
+        """Updates an instance by adding or updating attribute."""
+        if line == "" or line is None:
+            print("** class name missing **")
+            return
+        rex = r'^(\S+)(?:\s(\S+)(?:\s(\S+)(?:\s((?:"[^"]*")|(?:(\S)+)))?)?)?'
+        classname, uid, attribute, value = re.search(rex, line).groups()[:4]
+        if classname not in storage.classes():
+            print("** class doesn't exist **")
+        elif uid is None:
+            print("** instance id missing **")
+        else:
+            key = "{}.{}".format(classname, uid)
+            if key not in storage.all():
+                print("** no instance found **")
+            elif not attribute:
+                print("** attribute name missing **")
+            elif not value:
+                print("** value missing **")
+            else:
+                cast = None
+                if not re.search('^".*"$', value):
+                    if '.' in value:
+                        cast = float
+                    else:
+                        cast = int
+                else:
+                    value = value.replace('"', '')
+                attributes = storage.attributes()[classname]
+                if attribute in attributes:
+                    value = attributes[attribute](value)
+                elif cast:
+                    try:
+                        value = cast(value)
+                    except ValueError:
+                        pass
+                setattr(storage.all()[key], attribute, value)
+                storage.all()[key].save()
 
 
 class TestHBNBCommand(unittest.TestCase):
@@ -53,7 +170,8 @@ class TestHBNBCommand(unittest.TestCase):
         fns = """
 Documented commands (type help <topic>):
 ========================================
-EOF  all  count  create  destroy  help  quit  show  update
+EOF  begin   count   destroy  help    quit      show  
+all  commit  create  export   import  rollback  update
 
 """
         self.assertEqual(fns, fnf.getvalue())
@@ -357,6 +475,38 @@ EOF  all  count  create  destroy  help  quit  show  update
         self.assertTrue(len(fns) > 0)
         self.assertIn(uid, fns)
 
+    def test_do_all_output(self):
+        """Tests that all prints the list of string representations."""
+        from models import storage
+        for i in range(3):
+            self.create_class("State")
+        self.create_class("City")
+        for line, objs in (("all", storage.all().values()),
+                           ("all State", storage.all("State").values()),
+                           ("all City", storage.all("City").values()),
+                           ("all Amenity", [])):
+            with patch('sys.stdout', new=StringIO()) as fnf:
+                HBNBCommand().onecmd(line)
+            self.assertEqual(fnf.getvalue(),
+                             str([str(obj) for obj in objs]) + "\n")
+
+    def test_do_all_page_size(self):
+        """Tests all with --page-size."""
+        from models import storage
+        for i in range(5):
+            self.create_class("State")
+        nl = [str(obj) for obj in storage.all("State").values()]
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd("all State --page-size 2")
+        self.assertEqual(fnf.getvalue(), "{}\n{}\n{}\n".format(
+            nl[0:2], nl[2:4], nl[4:]))
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd("all --page-size 5")
+        self.assertEqual(fnf.getvalue(), str(nl) + "\n")
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd("all State --page-size 0")
+        self.assertEqual(fnf.getvalue(), "** invalid page size **\n")
+
     def test_do_all_error(self):
         """Tests all command with errors."""
         with patch('sys.stdout', new=StringIO()) as fnf:
@@ -406,6 +556,48 @@ EOF  all  count  create  destroy  help  quit  show  update
         fnmsg = fnf.getvalue()[:-1]
         self.assertEqual(fnmsg, "** class name missing **")
 
+    def test_where(self):
+        """Tests .where() with conditions and options."""
+        uids = []
+        for i in range(4):
+            uid = self.create_class("Place")
+            HBNBCommand().onecmd(
+                'Place.update("{}", {{"city_id": "c{}", '
+                '"price_by_night": {}}})'.format(uid, i % 2, 10 * i))
+            uids.append(uid)
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd(
+                'Place.where(city_id == "c0", price_by_night < 30)')
+        fns = fnf.getvalue()
+        self.assertIn(uids[0], fns)
+        self.assertIn(uids[2], fns)
+        self.assertNotIn(uids[1], fns)
+        self.assertNotIn(uids[3], fns)
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd(
+                'Place.where(order_by=-price_by_night, limit=2)')
+        fns = fnf.getvalue()
+        self.assertLess(fns.index(uids[3]), fns.index(uids[2]))
+        self.assertNotIn(uids[1], fns)
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd('City.where()')
+        self.assertEqual(fnf.getvalue(), "[]\n")
+
+    def test_where_error(self):
+        """Tests .where() with errors."""
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd(".where()")
+        self.assertEqual(fnf.getvalue()[:-1], "** class name missing **")
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd("garbage.where()")
+        self.assertEqual(fnf.getvalue()[:-1], "** class doesn't exist **")
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd("Place.where(price_by_night)")
+        self.assertEqual(fnf.getvalue()[:-1], "** invalid where clause **")
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd("Place.where(max_guest > many)")
+        self.assertEqual(fnf.getvalue()[:-1], "** invalid where clause **")
+
     def test_update_1(self):
         """Tests update 1..."""
         classname = "BaseModel"
@@ -662,6 +854,330 @@ EOF  all  count  create  destroy  help  quit  show  update
         fnmsg = fnf.getvalue()[:-1]
         self.assertEqual(fnmsg, "** value missing **")
 
+    def test_transaction(self):
+        """Tests the begin, commit and rollback commands."""
+        fnp = FileStorage._FileStorage__file_path
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd("begin")
+            HBNBCommand().onecmd("begin")
+        self.assertEqual(fnf.getvalue(), "** transaction already open **\n")
+        uid = self.create_class("Place")
+        self.assertFalse(os.path.isfile(fnp))
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd("commit")
+            HBNBCommand().onecmd("commit")
+        self.assertEqual(fnf.getvalue(), "** no transaction open **\n")
+        with open(fnp, "r", encoding="utf-8") as fnf:
+            self.assertIn("Place." + uid, json.load(fnf))
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd("begin")
+            HBNBCommand().onecmd('Place.update("{}", {{"name": "Loft"}})'
+                                 .format(uid))
+            HBNBCommand().onecmd("destroy Place {}".format(uid))
+            HBNBCommand().onecmd("rollback")
+            HBNBCommand().onecmd("rollback")
+        self.assertEqual(fnf.getvalue(), "** no transaction open **\n")
+        self.assertNotIn("name", storage.all()["Place." + uid].__dict__)
+
+    def test_read_only(self):
+        """Tests the commands writing to a mapped snapshot."""
+        uid = self.create_class("Place")
+        fnd = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, fnd)
+        path = os.path.join(fnd, "places.jsonl")
+        with open(path, "w") as fnf:
+            fnf.write('{"name": "Loft"}\n')
+        storage.snapshot()
+        FileStorage.mapped = True
+        try:
+            storage.reload()
+            HBNBCommand().onecmd("begin")
+            for line in ("create State", "destroy Place " + uid,
+                         "update Place {} name Loft".format(uid),
+                         'Place.update("{}", {{"name": "Loft"}})'
+                         .format(uid),
+                         "Place.update_where({'name': 'Loft'})",
+                         "import Place " + path, "commit"):
+                with patch('sys.stdout', new=StringIO()) as fnf:
+                    HBNBCommand().onecmd(line)
+                self.assertEqual(fnf.getvalue(),
+                                 "** storage is read-only **\n")
+            self.assertEqual(list(storage.all()), ["Place." + uid])
+            self.assertEqual(storage.all()["Place." + uid].name, "")
+        finally:
+            FileStorage.mapped = False
+            os.remove(FileStorage._FileStorage__file_path + ".snap")
+
+    def test_batch(self):
+        """Tests running commands as one transaction with one save."""
+        uid = self.create_class("State")
+        lines = ["create City\n", 'State.update("{}", {{"name": "Ohio"}})\n'
+                 .format(uid), "\n", "count City\n"]
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            with patch.object(FileStorage, "_FileStorage__replace") as m:
+                self.assertTrue(HBNBCommand().batch(lines))
+        self.assertEqual(m.call_count, 1)
+        cid = fnf.getvalue().split("\n")[0]
+        self.assertEqual(fnf.getvalue(), cid + "\n1\n")
+        self.assertIn("City." + cid, storage.all())
+        self.assertEqual(storage.all()["State." + uid].name, "Ohio")
+
+    def test_batch_rollback(self):
+        """Tests that a failing command rolls the whole batch back."""
+        uid = self.create_class("State")
+        lines = ['State.update("{}", {{"name": "Ohio"}})'.format(uid),
+                 "create City", "destroy State {}".format(uid),
+                 "show City 1234", "create Place"]
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            with patch.object(FileStorage, "_FileStorage__replace") as m:
+                self.assertFalse(HBNBCommand().batch(lines))
+        m.assert_not_called()
+        self.assertEqual(fnf.getvalue().split("\n")[1:], [
+            "** no instance found **", "** line 4: rolled back **", ""])
+        self.assertEqual(list(storage.all()), ["State." + uid])
+        self.assertNotIn("name", storage.all()["State." + uid].__dict__)
+
+    def test_batch_unknown_syntax(self):
+        """Tests that lines in no known syntax roll the batch back."""
+        uid = self.create_class("State")
+        for line in ("bogus command here",
+                     'State.updte("{}", "name", "Ohio")'.format(uid)):
+            with patch('sys.stdout', new=StringIO()) as fnf:
+                self.assertFalse(HBNBCommand().batch(
+                    ["create City", line]))
+            self.assertEqual(fnf.getvalue().split("\n")[1:], [
+                "** unknown syntax **", "** line 2: rolled back **", ""])
+            self.assertEqual(list(storage.all()), ["State." + uid])
+
+    def test_batch_script(self):
+        """Tests console.py --batch."""
+        fnd = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, fnd)
+        with open(os.path.join(fnd, "script.hbnb"), "w") as fnf:
+            fnf.write("create User\ncreate Place\n")
+        console = os.path.abspath(sys.modules[HBNBCommand.__module__]
+                                  .__file__)
+        out = subprocess.run([sys.executable, console, "--batch",
+                              "script.hbnb"], cwd=fnd, capture_output=True,
+                             text=True)
+        self.assertEqual(out.returncode, 0)
+        with open(os.path.join(fnd, "file.json"), "r") as fnf:
+            self.assertEqual(sorted(json.load(fnf)), sorted(
+                ["User." + out.stdout.split()[0],
+                 "Place." + out.stdout.split()[1]]))
+
+    def test_update_where(self):
+        """Tests updating the objects matching conditions at once."""
+        uids = [self.create_class("Place") for i in range(4)]
+        for i, uid in enumerate(uids):
+            storage.all()["Place." + uid].city_id = "c{}".format(i % 2)
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            with patch.object(FileStorage, "save") as m:
+                HBNBCommand().onecmd('Place.update_where(city_id == "c1", '
+                                     '{"price_by_night": "120", '
+                                     '"name": "Loft"})')
+        self.assertEqual(fnf.getvalue(), "2\n")
+        self.assertEqual(m.call_count, 1)
+        self.assertEqual([(fno.price_by_night, fno.name)
+                          for fno in storage.all().values()],
+                         [(0, ""), (120, "Loft"), (0, ""), (120, "Loft")])
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd("Place.update_where({'max_guest': 2})")
+        self.assertEqual(fnf.getvalue(), "4\n")
+
+    def test_update_where_error(self):
+        """Tests update_where() with errors."""
+        for command, fnmsg in (
+                (".update_where({})", "** class name missing **"),
+                ("garbage.update_where({})", "** class doesn't exist **"),
+                ('Place.update_where(name == "a")',
+                 "** attributes missing **"),
+                ('Place.update_where(name ~ "a", {"a": 1})',
+                 "** invalid where clause **"),
+                ('Place.update_where(limit=1, {"a": 1})',
+                 "** invalid where clause **"),
+                ('Place.update_where({"max_guest": "many"})',
+                 "** invalid attributes **"),
+                ('Place.update_where({"id": "1"})',
+                 "** invalid attributes **"),
+                ('Place.update_where({"a": })',
+                 "** invalid attributes **")):
+            with patch('sys.stdout', new=StringIO()) as fnf:
+                HBNBCommand().onecmd(command)
+            self.assertEqual(fnf.getvalue(), fnmsg + "\n")
+
+    def test_destroy_where(self):
+        """Tests destroying the objects matching conditions at once."""
+        sid = self.create_class("State")
+        cids = [self.create_class("City") for i in range(3)]
+        for cid in cids[:2]:
+            storage.all()["City." + cid].state_id = sid
+        fnp = storage.classes()["Place"]()
+        fnp.city_id = cids[0]
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd('City.destroy_where(state_id == "{}")'
+                                 .format(sid))
+        self.assertEqual(fnf.getvalue(), "2\n")
+        self.assertEqual(sorted(storage.all()), sorted(
+            ["State." + sid, "City." + cids[2], "Place." + fnp.id]))
+        storage.all()["City." + cids[2]].state_id = sid
+        fnp.city_id = cids[2]
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            with patch.object(FileStorage, "save") as m:
+                HBNBCommand().onecmd('State.destroy_where(cascade)')
+        self.assertEqual(fnf.getvalue(), "3\n")
+        self.assertEqual(m.call_count, 1)
+        self.assertEqual(storage.all(), {})
+
+    def test_destroy_where_error(self):
+        """Tests destroy_where() with errors."""
+        for command, fnmsg in (
+                (".destroy_where()", "** class name missing **"),
+                ("garbage.destroy_where()", "** class doesn't exist **"),
+                ('Place.destroy_where(name ~ "a")',
+                 "** invalid where clause **"),
+                ('Place.destroy_where(cascade, name == "a")',
+                 "** invalid where clause **"),
+                ("Place.destroy_where(limit=1)",
+                 "** invalid where clause **")):
+            with patch('sys.stdout', new=StringIO()) as fnf:
+                HBNBCommand().onecmd(command)
+            self.assertEqual(fnf.getvalue(), fnmsg + "\n")
+
+    def test_import_export(self):
+        """Tests exporting to JSON Lines and CSV and importing back."""
+        fnd = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, fnd)
+        for i in range(3):
+            fnp = storage.classes()["Place"]()
+            fnp.name = "Loft {}".format(i)
+            fnp.max_guest = i
+            fnp.amenity_ids = ["wifi", str(i)]
+        fnp.nickname = "Home"
+        self.create_class("City")
+        saved = {fnk: fno.to_dict() for fnk, fno in storage.all().items()
+                 if fnk.startswith("Place.")}
+        for name in ("places.jsonl", "places.csv"):
+            path = os.path.join(fnd, name)
+            with patch('sys.stdout', new=StringIO()) as fnf:
+                HBNBCommand().onecmd("export Place " + path)
+            self.assertEqual(fnf.getvalue(), "3\n")
+            self.resetStorage()
+            with patch('sys.stdout', new=StringIO()) as fnf:
+                HBNBCommand().onecmd("import Place " + path)
+            self.assertEqual(fnf.getvalue(), "3\n")
+            self.assertEqual({fnk: fno.to_dict()
+                              for fnk, fno in storage.all().items()}, saved)
+            storage.reload()
+            self.assertEqual({fnk: fno.to_dict()
+                              for fnk, fno in storage.all().items()}, saved)
+
+    def test_import_cast(self):
+        """Tests that imported values get the types of attributes()."""
+        fnd = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, fnd)
+        path = os.path.join(fnd, "places.csv")
+        with open(path, "w") as fnf:
+            fnf.write('name,max_guest,latitude,amenity_ids,extra\n'
+                      'Loft,4,1.5,"[""wifi""]",\n')
+        with patch('sys.stdout', new=StringIO()) as fnf:
+            HBNBCommand().onecmd("import Place " + path)
+        self.assertEqual(fnf.getvalue(), "1\n")
+        fnp = next(iter(storage.all().values()))
+        self.assertEqual((fnp.name, fnp.max_guest, fnp.latitude,
+                          fnp.amenity_ids), ("Loft", 4, 1.5, ["wifi"]))
+        self.assertNotIn("extra", fnp.__dict__)
+        self.assertIsInstance(fnp.created_at, datetime.datetime)
+        self.assertEqual(storage.all(), {"Place." + fnp.id: fnp})
+
+    def test_import_export_error(self):
+        """Tests import and export with errors."""
+        fnd = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, fnd)
+        path = os.path.join(fnd, "places.jsonl")
+        with open(path, "w") as fnf:
+            fnf.write('{"name": "Loft"}\n{"max_guest": "many"}\n')
+        for command, fnmsg in (
+                ("import", "** class name missing **"),
+                ("export Garbage a.csv", "** class doesn't exist **"),
+                ("import Place", "** file name missing **"),
+                ("export Place a.txt", "** unknown file format **"),
+                ("import Place " + path + ".csv", "** file can't be read **"),
+                ("import Place " + path, "** invalid record **"),
+                ("export Place " + fnd, "** unknown file format **")):
+            with patch('sys.stdout', new=StringIO()) as fnf:
+                HBNBCommand().onecmd(command)
+            self.assertEqual(fnf.getvalue(), fnmsg + "\n")
+        self.assertEqual(storage.all(), {})
+        for line in ("[1, 2]", '"x"'):
+            with open(path, "w") as fnf:
+                fnf.write(line + "\n")
+            with patch('sys.stdout', new=StringIO()) as fnf:
+                HBNBCommand().onecmd("import Place " + path)
+            self.assertEqual(fnf.getvalue(), "** invalid record **\n")
+        self.assertEqual(storage.all(), {})
+
+    def test_parser_fuzz(self):
+        """Tests the parser against the one it replaced on random lines.
+
+        Ids and attributes with whitespace, and arguments without a class
+        name, are left out: the old parser lost them re-assembling the
+        command.
+        """
+        fnr = random.Random(108)
+        uid = self.create_class("Place")
+        self.create_class("User")
+        state = {fnk: fnv.to_dict() for fnk, fnv in storage.all().items()}
+        classes = ["Place"] * 4 + ["User", "State", "Nope"]
+        uids = [uid] * 6 + [uid + "x", "", "12,3", '"' + uid, "{}"]
+        words = ['"name"', '"max_guest"', '"latitude"', '"foo"', 'name',
+                 '"na,me"', '""', '"max_guest" x']
+        values = ['"Loft"', '"a b, c"', "12", "1.5", "abc", "1.2.3", '"',
+                  '"a"b', " 7", "", '{"name": "Loft", "max_guest": 4}',
+                  "{'name': 'Loft'}", "{bad}", "4, 5", "(", ")"]
+
+        def line():
+            """returns a random command"""
+            classname = fnr.choice(classes)
+            args = [fnr.choice(['"{}"'] * 3 + ["{}"]).format(
+                        fnr.choice(uids)),
+                    fnr.choice(words), fnr.choice(values)]
+            args = args[:fnr.randrange(4)]
+            if args and fnr.randrange(4) == 0:
+                args.insert(1, fnr.choice([fnv for fnv in values
+                                           if " " not in fnv]))
+            method = fnr.choice(["show", "destroy", "update", "update",
+                                 "update", "count", "all", "nothing"])
+            if fnr.randrange(2):
+                return "{}.{}({})".format(classname, method, ", ".join(args))
+            if not fnr.randrange(8):
+                return ".{}()".format(method)
+            fnw = [fnr.choice(["show", "destroy", "update"]), classname]
+            return " ".join(fnw + [fnv.strip('"')
+                                     if i == 0 else fnv
+                                     for i, fnv in enumerate(args)])
+
+        def run(console, command):
+            """returns what console printed and raised, and the objects"""
+            FileStorage._FileStorage__objects = {
+                fnk: storage.classes()[fnv["__class__"]](**fnv)
+                for fnk, fnv in state.items()}
+            error = None
+            with patch('sys.stdout', new=StringIO()) as fnf:
+                try:
+                    console.onecmd(command)
+                except Exception as e:
+                    error = type(e)
+            objects = {fnk: {fnn: fnv for fnn, fnv in fno.to_dict().items()
+                             if fnn != "updated_at"}
+                       for fnk, fno in storage.all().items()}
+            return fnf.getvalue(), error, objects
+
+        for i in range(2000):
+            command = line()
+            self.assertEqual(run(HBNBCommand(), command),
+                             run(LegacyCommand(), command), command)
+
     def create_class(self, classname):
         """Creates a class for console tests."""
         with patch('sys.stdout', new=StringIO()) as fnf:
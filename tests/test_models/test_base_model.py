@@ -158,6 +158,18 @@ class TestBaseModel(unittest.TestCase):
         fno = BaseModel(**fnd)
         self.assertEqual(fno.to_dict(), fnd)
 
+    def test_4_instantiation_no_microseconds(self):
+        """Tests **kwargs timestamps that isoformat() wrote without %f."""
+        fnb = BaseModel()
+        fnb.created_at = datetime(2023, 8, 13, 8, 50, 40)
+        fnb.updated_at = datetime(2023, 8, 13, 8, 50, 40, 1)
+        fnd = fnb.to_dict()
+        self.assertEqual(fnd["created_at"], "2023-08-13T08:50:40")
+        fno = BaseModel(**fnd)
+        self.assertEqual(fno.created_at, fnb.created_at)
+        self.assertEqual(fno.updated_at, fnb.updated_at)
+        self.assertEqual(fno.to_dict(), fnd)
+
     def test_5_save(self):
         """Tests that storage.save() is called from save()."""
         self.resetStorage()
@@ -189,5 +201,80 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(str(e.exception), fnmsg)
 
 
+class TestCompactModel(unittest.TestCase):
+
+    """Test Cases for the compact variants of the models."""
+
+    def setUp(self):
+        """Sets up test methods."""
+        from models.base_model import compact_class
+        from models.place import Place
+        self.Place = Place
+        self.CompactPlace = compact_class(Place)
+
+    def tearDown(self):
+        """Tears down test methods."""
+        FileStorage.compact_models = False
+        FileStorage._FileStorage__objects = {}
+        if os.path.isfile(FileStorage._FileStorage__file_path):
+            os.remove(FileStorage._FileStorage__file_path)
+
+    def test_class(self):
+        """Tests the compact class looks like the regular one."""
+        from models.base_model import compact_class
+        self.assertIs(compact_class(self.Place), self.CompactPlace)
+        self.assertEqual(str(self.CompactPlace),
+                         "<class 'models.place.Place'>")
+        fno = self.CompactPlace()
+        self.assertIsInstance(fno, self.Place)
+        self.assertIn("Place." + fno.id, storage.all())
+
+    def test_attributes(self):
+        """Tests defaults, slots and extra attributes."""
+        fno = self.CompactPlace()
+        self.assertEqual(fno.number_rooms, 0)
+        self.assertEqual(fno.amenity_ids, [])
+        fno.number_rooms = 3
+        fno.nickname = "Loft"
+        self.assertEqual(fno.number_rooms, 3)
+        self.assertEqual(fno.nickname, "Loft")
+        with self.assertRaises(AttributeError):
+            fno.garbage
+
+    def test_to_dict_and_str(self):
+        """Tests to_dict() and __str__ against the regular class."""
+        fno = self.CompactPlace()
+        fno.name = "Loft"
+        fno.nickname = "Home"
+        fnd = fno.to_dict()
+        fnr = self.Place(**fnd)
+        self.assertEqual(fnr.to_dict(), fnd)
+        fnd2 = fnr.__dict__.copy()
+        del fnd2["__class__"]
+        self.assertEqual(fno.__dict__, fnd2)
+        self.assertEqual(str(fno), "[Place] ({}) {}".format(fno.id, fnd2))
+        fnc = self.CompactPlace(**fnd)
+        self.assertEqual(fnc.to_dict(), fnd)
+
+    def test_not_registered(self):
+        """Tests that the compact variant does not replace the model."""
+        from models.base_model import registry
+        self.assertIs(registry["Place"], self.Place)
+
+    def test_storage_compact(self):
+        """Tests that compact storage saves and reloads compact objects."""
+        FileStorage.compact_models = True
+        fno = storage.classes()["Place"]()
+        self.assertIs(type(fno), self.CompactPlace)
+        fno.city_id = "c1"
+        storage.save()
+        storage.reload()
+        fnr = storage.all()["Place." + fno.id]
+        self.assertIs(type(fnr), self.CompactPlace)
+        self.assertEqual(fnr.to_dict(), fno.to_dict())
+        self.assertEqual(list(storage.lookup("Place", "city_id", "c1")),
+                         ["Place." + fno.id])
+
+
 if __name__ == '__main__':
     unittest.main()
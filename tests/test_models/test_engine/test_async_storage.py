@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+"""Unittest module for the AsyncStorage class."""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from models import storage
+from models.base_model import BaseModel
+from models.engine.async_storage import AsyncStorage
+from models.engine.file_storage import FileStorage
+
+
+class TestAsyncStorage(unittest.IsolatedAsyncioTestCase):
+    """Test Cases for the AsyncStorage class."""
+
+    def setUp(self):
+        """Points FileStorage at a temporary file."""
+        self.path = FileStorage._FileStorage__file_path
+        self.tmpdir = tempfile.mkdtemp()
+        FileStorage._FileStorage__file_path = os.path.join(self.tmpdir,
+                                                           "file.json")
+        FileStorage._FileStorage__objects = {}
+        self.storage = AsyncStorage(storage)
+
+    def tearDown(self):
+        """Tears down test methods."""
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__file_path = self.path
+        shutil.rmtree(self.tmpdir)
+
+    def saved(self):
+        """Returns the keys in the file."""
+        with open(FileStorage._FileStorage__file_path,
+                  "r", encoding="utf-8") as fnf:
+            return sorted(json.load(fnf))
+
+    async def test_asave(self):
+        """Tests that asave() writes the objects off the loop."""
+        fnb = BaseModel()
+        threads = []
+        save = FileStorage.save
+
+        def record(self):
+            threads.append(threading.current_thread())
+            save(self)
+        with patch.object(FileStorage, "save", record):
+            await self.storage.asave()
+        self.assertEqual(self.saved(), ["BaseModel." + fnb.id])
+        self.assertNotIn(threading.current_thread(), threads)
+
+    async def test_asave_coalesces(self):
+        """Tests that saves asked for during a write share the next one."""
+        save = FileStorage.save
+
+        def slow(self):
+            time.sleep(0.05)
+            save(self)
+        BaseModel()
+        with patch.object(FileStorage, "save", autospec=True,
+                          side_effect=slow) as m:
+            first = asyncio.ensure_future(self.storage.asave())
+            await asyncio.sleep(0.01)
+            fnb = BaseModel()
+            await asyncio.gather(*[self.storage.asave() for i in range(10)])
+            await first
+        self.assertEqual(m.call_count, 2)
+        self.assertIn("BaseModel." + fnb.id, self.saved())
+
+    async def test_asave_error(self):
+        """Tests that asave() raises what the write raised."""
+        BaseModel()
+        with patch.object(FileStorage, "save",
+                          side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                await self.storage.asave()
+        await self.storage.asave()
+        self.assertEqual(len(self.saved()), 1)
+
+    async def test_areload(self):
+        """Tests that areload() reads the file back."""
+        fnb = BaseModel()
+        await self.storage.asave()
+        FileStorage._FileStorage__objects = {}
+        await self.storage.areload()
+        self.assertEqual(list(self.storage.all()), ["BaseModel." + fnb.id])
+
+    async def test_aquery(self):
+        """Tests iterating aquery()."""
+        fnps = [storage.classes()["Place"]() for i in range(5)]
+        for i, fnp in enumerate(fnps):
+            fnp.number_rooms = i
+        fnl = [fnp async for fnp in self.storage.aquery(
+            "Place", [("number_rooms", ">", 1)], "-number_rooms", 2)]
+        self.assertEqual(fnl, [fnps[4], fnps[3]])
+
+    def test_engine_attributes(self):
+        """Tests that the facade exposes the engine."""
+        fnb = BaseModel()
+        self.assertIs(self.storage.all(), storage.all())
+        self.assertEqual(self.storage.count("BaseModel"), 1)
+        self.assertEqual(self.storage.classes(), storage.classes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""Unittest module for the bulk import and export module."""
+
+import io
+import unittest
+from datetime import datetime
+from models.engine import bulk
+
+
+class TestBulk(unittest.TestCase):
+    """Test Cases for the bulk module."""
+
+    records = [{"id": "1", "name": "Loft", "amenity_ids": ["wifi"]},
+               {"id": "2", "name": "Flat, 2nd floor", "max_guest": 4}]
+
+    def test_format_for(self):
+        """Tests picking the format from the extension."""
+        self.assertEqual(bulk.format_for("a/places.JSONL"), "jsonl")
+        self.assertEqual(bulk.format_for("places.ndjson"), "jsonl")
+        self.assertEqual(bulk.format_for("places.csv"), "csv")
+        with self.assertRaises(ValueError):
+            bulk.format_for("places.json")
+
+    def test_jsonl(self):
+        """Tests writing and reading JSON Lines."""
+        fnf = io.StringIO()
+        self.assertEqual(bulk.write(fnf, "jsonl", iter(self.records)), 2)
+        self.assertEqual(len(fnf.getvalue().splitlines()), 2)
+        fnf.seek(0)
+        self.assertEqual(list(bulk.read(fnf, "jsonl")), self.records)
+
+    def test_jsonl_not_object(self):
+        """Tests that JSON lines other than objects are refused."""
+        for line in ("[1, 2]", '"x"', "3", "null"):
+            with self.assertRaises(ValueError):
+                list(bulk.read(io.StringIO(line + "\n"), "jsonl"))
+
+    def test_csv(self):
+        """Tests writing and reading CSV."""
+        fnf = io.StringIO()
+        self.assertEqual(bulk.write(fnf, "csv", iter(self.records),
+                                    ["id", "name", "max_guest",
+                                     "amenity_ids"]), 2)
+        self.assertEqual(fnf.getvalue().splitlines()[0],
+                         "id,name,max_guest,amenity_ids")
+        fnf.seek(0)
+        self.assertEqual(list(bulk.read(fnf, "csv")), [
+            {"id": "1", "name": "Loft", "amenity_ids": '["wifi"]'},
+            {"id": "2", "name": "Flat, 2nd floor", "max_guest": "4"}])
+
+    def test_coerce(self):
+        """Tests casting records to the attribute types."""
+        types = {"id": str, "created_at": datetime, "max_guest": int,
+                 "latitude": float, "amenity_ids": list}
+        fnd = bulk.coerce({"id": "1", "max_guest": "4", "latitude": 2,
+                           "amenity_ids": '["wifi"]', "other": "x",
+                           "created_at": "2020-01-02T03:04:05"},
+                          "Place", types)
+        self.assertEqual(fnd["max_guest"], 4)
+        self.assertIs(type(fnd["latitude"]), float)
+        self.assertEqual(fnd["amenity_ids"], ["wifi"])
+        self.assertEqual(fnd["other"], "x")
+        self.assertEqual(fnd["created_at"], "2020-01-02T03:04:05")
+        self.assertIsInstance(fnd["updated_at"], datetime)
+        self.assertEqual(fnd["__class__"], "Place")
+        self.assertTrue(bulk.coerce({}, "Place", types)["id"])
+        with self.assertRaises(ValueError):
+            bulk.coerce({"max_guest": "many"}, "Place", types)
+
+
+if __name__ == "__main__":
+    unittest.main()
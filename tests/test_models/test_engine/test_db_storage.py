@@ -0,0 +1,203 @@
+#!/usr/bin/python3
+"""Unittest module for the DBStorage class."""
+
+import unittest
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+from unittest.mock import patch
+import models
+import models.base_model
+from models.base_model import BaseModel
+from models.engine.db_storage import DBStorage
+from tests.test_models.test_engine import test_file_storage
+
+
+class TestDBStorage(test_file_storage.TestFileStorage):
+    """Runs the FileStorage test cases against DBStorage."""
+
+    engine = DBStorage
+
+    def setUp(self):
+        """Points the models at a DBStorage in a temporary directory."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "file.db")
+        self.storage = None
+        self.resetStorage()
+
+    def resetStorage(self):
+        """Replaces the storage with an empty database."""
+        if self.storage is not None:
+            self.storage.close()
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+        self.storage = DBStorage(self.path)
+        for module in (models, models.base_model, test_file_storage):
+            patcher = patch.object(module, "storage", self.storage)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Tears down test methods."""
+        self.storage.close()
+        shutil.rmtree(self.tmpdir)
+
+    def stored(self):
+        """Returns the rows of every table, keyed like the objects."""
+        rows = {}
+        with sqlite3.connect(self.path) as db:
+            for name in self.storage.classes():
+                for row in db.execute('SELECT * FROM "{}"'.format(name)):
+                    rows["{}.{}".format(name, row[0])] = row
+        return rows
+
+    def statements(self):
+        """Returns the list the storage logs its SQL statements to."""
+        fnl = []
+        self.storage._DBStorage__connect().set_trace_callback(fnl.append)
+        return fnl
+
+    def assertArgs(self, fnmsg, func, *args):
+        """Asserts that func(*args) raises the TypeError fnmsg, which
+        Python 3.10 and later prefix with the class name."""
+        with self.assertRaises(TypeError) as e:
+            func(*args)
+        self.assertRegex(str(e.exception),
+                         r"^(DBStorage\.)?" + re.escape(fnmsg) + "$")
+
+    def test_3_init_no_args(self):
+        """Tests __init__ with no arguments."""
+        self.assertArgs(
+            "__init__() missing 1 required positional argument: 'self'",
+            DBStorage.__init__)
+
+    def test_3_init_many_args(self):
+        """Tests __init__ with many arguments."""
+        self.assertArgs("__init__() takes from 1 to 2 positional arguments "
+                        "but 11 were given", DBStorage, *range(10))
+
+    def test_5_all_no_args(self):
+        """Tests all() with no arguments."""
+        self.assertArgs(
+            "all() missing 1 required positional argument: 'self'",
+            DBStorage.all)
+
+    def test_5_all_excess_args(self):
+        """Tests all() with too many arguments."""
+        self.assertArgs(
+            "all() takes from 1 to 2 positional arguments but 3 were given",
+            DBStorage.all, self.storage, 98, 99)
+
+    def test_5_new_no_args(self):
+        """Tests new() with no arguments."""
+        self.assertArgs(
+            "new() missing 1 required positional argument: 'obj'",
+            self.storage.new)
+
+    def test_5_new_excess_args(self):
+        """Tests new() with too many arguments."""
+        self.assertArgs("new() takes 2 positional arguments but 3 were "
+                        "given", self.storage.new, BaseModel(), 98)
+
+    def test_5_save_no_args(self):
+        """Tests save() with no arguments."""
+        self.assertArgs(
+            "save() missing 1 required positional argument: 'self'",
+            DBStorage.save)
+
+    def test_5_save_excess_args(self):
+        """Tests save() with too many arguments."""
+        self.assertArgs(
+            "save() takes 1 positional argument but 2 were given",
+            DBStorage.save, self.storage, 98)
+
+    def test_5_reload_no_args(self):
+        """Tests reload() with no arguments."""
+        self.assertArgs(
+            "reload() missing 1 required positional argument: 'self'",
+            DBStorage.reload)
+
+    def test_5_reload_excess_args(self):
+        """Tests reload() with too many arguments."""
+        self.assertArgs(
+            "reload() takes 1 positional argument but 2 were given",
+            DBStorage.reload, self.storage, 98)
+
+    def test_5_attributes(self):
+        """Tests the tables and their indexes."""
+        self.storage.save()
+        with sqlite3.connect(self.path) as db:
+            fnc = [row[1] for row in db.execute('PRAGMA table_info("City")')]
+            fni = [row[1] for row in db.execute('PRAGMA index_list("City")')]
+        self.assertEqual(fnc, ["id", "created_at", "updated_at",
+                               "state_id", "name", "extra"])
+        self.assertIn("City_state_id", fni)
+        self.assertEqual(self.stored(), {})
+
+    def test_5_query_early_termination(self):
+        """Tests that query() leaves limit to the database."""
+        self.help_make_places()
+        fnl = self.statements()
+        fnps = self.storage.query("Place", [("price_by_night", "<=", 100)],
+                                  limit=2)
+        self.assertEqual(len(fnps), 2)
+        self.assertIn("LIMIT 2 OFFSET 0", fnl[-1])
+
+    def help_test_save(self, classname):
+        """Helps tests save() method for classname."""
+        cls = self.storage.classes()[classname]
+        fno = cls()
+        key = "{}.{}".format(type(fno).__name__, fno.id)
+        self.storage.save()
+        self.assertEqual(list(self.stored()), [key])
+        self.assertEqual(self.stored()[key][:3],
+                         (fno.id, fno.created_at.isoformat(),
+                          fno.updated_at.isoformat()))
+
+    def test_5_save_encodes_dirty_only(self):
+        """Tests that save() only writes objects changed since the last."""
+        fnos = [BaseModel() for i in range(10)]
+        self.storage.save()
+        fnos[2].name = "Betty"
+        fnos.append(BaseModel())
+        self.storage.delete(fnos[0])
+        fnl = self.statements()
+        self.storage.save()
+        self.assertEqual(sorted(fns.split()[0] for fns in fnl),
+                         ["BEGIN", "COMMIT", "DELETE", "INSERT", "UPDATE"])
+        self.assertEqual(sorted(self.stored()),
+                         sorted("BaseModel." + fno.id for fno in fnos[1:]))
+        self.storage.reload()
+        self.assertEqual(self.storage.all()["BaseModel." + fnos[2].id].name,
+                         "Betty")
+
+    def test_5_save_extra_attributes(self):
+        """Tests that attributes without a column survive a reload."""
+        fno = self.storage.classes()["Place"]()
+        fno.amenity_ids = ["a", "b"]
+        fno.number_rooms = 3
+        fno.color = "blue"
+        self.storage.save()
+        self.storage.reload()
+        fnr = self.storage.all()["Place." + fno.id]
+        self.assertEqual(fnr.to_dict(), fno.to_dict())
+        self.assertEqual(fnr.name, "")
+
+    def test_5_query_attribute_without_column(self):
+        """Tests query() conditions on attributes without a column."""
+        fnps = self.help_make_places()
+        fnps[3].color = "red"
+        fnps[6].color = "red"
+        self.assertEqual(self.storage.query("Place",
+                                            [("color", "==", "red")]),
+                         [fnps[3], fnps[6]])
+        self.assertEqual(self.storage.query("Place",
+                                            [("color", "==", "red")],
+                                            "price_by_night", 1),
+                         [fnps[6]])
+
+
+if __name__ == "__main__":
+    unittest.main()
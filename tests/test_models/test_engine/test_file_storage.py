@@ -5,16 +5,25 @@ import unittest
 from datetime import datetime
 import time
 from models.base_model import BaseModel
-from models.engine.file_storage import FileStorage
+from models.engine.file_storage import FileStorage, ConflictError
 from models import storage
 import re
+import io
 import json
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest.mock import patch
 
 
 class TestFileStorage(unittest.TestCase):
     """Test Cases for the FileStorage class."""
 
+    engine = FileStorage
+
     def setUp(self):
         """Sets up test methods."""
         pass
@@ -30,15 +39,22 @@ class TestFileStorage(unittest.TestCase):
         self.resetStorage()
         pass
 
+    def endTransaction(self):
+        """Rolls back the transaction a failed test left open."""
+        try:
+            storage.rollback()
+        except ValueError:
+            pass
+
     def test_5_instantiation(self):
         """Tests instantiation of storage class."""
-        self.assertEqual(type(storage).__name__, "FileStorage")
+        self.assertEqual(type(storage), self.engine)
 
     def test_3_init_no_args(self):
         """Tests __init__ with no arguments."""
         self.resetStorage()
         with self.assertRaises(TypeError) as e:
-            FileStorage.__init__()
+            self.engine.__init__()
         fnmsg = "descriptor '__init__' of 'object' object needs an argument"
         self.assertEqual(str(e.exception), fnmsg)
 
@@ -46,7 +62,7 @@ class TestFileStorage(unittest.TestCase):
         """Tests __init__ with many arguments."""
         self.resetStorage()
         with self.assertRaises(TypeError) as e:
-            fnb = FileStorage(0, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+            fnb = self.engine(0, 1, 2, 3, 4, 5, 6, 7, 8, 9)
         fnmsg = "object() takes no parameters"
         self.assertEqual(str(e.exception), fnmsg)
 
@@ -142,7 +158,7 @@ class TestFileStorage(unittest.TestCase):
         """Tests all() with no arguments."""
         self.resetStorage()
         with self.assertRaises(TypeError) as e:
-            FileStorage.all()
+            self.engine.all()
         fnmsg = "all() missing 1 required positional argument: 'self'"
         self.assertEqual(str(e.exception), fnmsg)
 
@@ -150,10 +166,357 @@ class TestFileStorage(unittest.TestCase):
         """Tests all() with too many arguments."""
         self.resetStorage()
         with self.assertRaises(TypeError) as e:
-            FileStorage.all(self, 98)
-        fnmsg = "all() takes 1 positional argument but 2 were given"
+            self.engine.all(self, 98, 99)
+        fnmsg = "all() takes from 1 to 2 positional arguments but 3 were given"
         self.assertEqual(str(e.exception), fnmsg)
 
+    def test_5_all_cls(self):
+        """Tests all() filtered by class."""
+        self.resetStorage()
+        fnus = [storage.classes()["User"]() for i in range(3)]
+        fnps = [storage.classes()["Place"]() for i in range(2)]
+        self.assertEqual(list(storage.all("User").values()), fnus)
+        self.assertEqual(list(storage.all(type(fnps[0])).values()), fnps)
+        self.assertEqual(storage.all("City"), {})
+        storage.delete(fnus[1])
+        self.assertEqual(list(storage.all("User").values()),
+                         [fnus[0], fnus[2]])
+
+    def test_5_count(self):
+        """Tests count() with and without a class."""
+        self.resetStorage()
+        for i in range(4):
+            storage.classes()["Review"]()
+        fnb = BaseModel()
+        self.assertEqual(storage.count(), 5)
+        self.assertEqual(storage.count("Review"), 4)
+        self.assertEqual(storage.count(BaseModel), 1)
+        self.assertEqual(storage.count("State"), 0)
+        storage.delete(fnb)
+        self.assertEqual(storage.count("BaseModel"), 0)
+        storage.save()
+        storage.reload()
+        self.assertEqual(storage.count("Review"), 4)
+
+    def test_5_indexes(self):
+        """Tests the indexed foreign keys."""
+        self.assertEqual(storage.indexes()["City"], ("state_id",))
+        self.assertEqual(storage.indexes()["Review"], ("place_id", "user_id"))
+        self.assertEqual(storage.indexes()["State"], ())
+
+    def test_5_classes_cached(self):
+        """Tests that classes() and attributes() are built once."""
+        self.assertIs(storage.classes(), storage.classes())
+        self.assertIs(storage.attributes(), storage.attributes())
+
+    def test_5_registry(self):
+        """Tests that a model defined later is registered."""
+        from models.base_model import registry
+        classes = storage.classes()
+        try:
+            class Booking(BaseModel):
+                """A model defined after the others"""
+                place_id = ""
+                nights = 0
+            self.assertIsNot(storage.classes(), classes)
+            self.assertIs(storage.classes()["Booking"], Booking)
+            self.assertEqual(storage.attributes()["Booking"],
+                             {"place_id": str, "nights": int})
+            old = Booking
+
+            class Booking(BaseModel):
+                """The model redefined, as reloading its module does"""
+                place_id = ""
+            self.assertIsNot(Booking, old)
+            self.assertIs(storage.classes()["Booking"], Booking)
+            self.assertEqual(storage.attributes()["Booking"],
+                             {"place_id": str})
+        finally:
+            del registry["Booking"]
+        self.assertNotIn("Booking", storage.classes())
+        self.assertNotIn("Booking", storage.attributes())
+
+    def test_5_transaction_commit(self):
+        """Tests that a transaction is saved at commit() only."""
+        self.resetStorage()
+        classes = storage.classes()
+        classes["User"]().save()
+        storage.begin()
+        self.addCleanup(self.endTransaction)
+        fnp = classes["Place"]()
+        fnp.name = "Loft"
+        fnp.save()
+        fnr = classes["Review"]()
+        fnr.save()
+        storage.reload()
+        self.assertNotIn("Place." + fnp.id, storage.all())
+        storage.new(fnp)
+        storage.new(fnr)
+        with self.assertRaises(ValueError):
+            storage.begin()
+        storage.commit()
+        storage.reload()
+        self.assertEqual(storage.all()["Place." + fnp.id].name, "Loft")
+        self.assertIn("Review." + fnr.id, storage.all())
+        with self.assertRaises(ValueError):
+            storage.commit()
+
+    def test_5_transaction_rollback(self):
+        """Tests that rollback() undoes the changes of a transaction."""
+        self.resetStorage()
+        classes = storage.classes()
+        fns = classes["State"]()
+        fns.name = "Texas"
+        fnp = classes["Place"]()
+        fnp.save()
+        before = {fnk: fno.to_dict() for fnk, fno in storage.all().items()}
+        storage.begin()
+        self.addCleanup(self.endTransaction)
+        fns.name = "Ohio"
+        fns.name = "Utah"
+        fnp.city_id = "c1"
+        fnp.number_rooms = 4
+        fnc = classes["City"]()
+        fnc.state_id = fns.id
+        storage.delete(fns)
+        fnp.save()
+        storage.rollback()
+        self.assertEqual({fnk: fno.to_dict()
+                          for fnk, fno in storage.all().items()}, before)
+        self.assertNotIn("city_id", fnp.__dict__)
+        self.assertEqual(fnp.number_rooms, 0)
+        self.assertEqual(list(storage.lookup("Place", "city_id", "c1")), [])
+        self.assertEqual(list(storage.lookup("City", "state_id", fns.id)),
+                         [])
+        storage.save()
+        storage.reload()
+        self.assertEqual({fnk: fno.to_dict()
+                          for fnk, fno in storage.all().items()}, before)
+        with self.assertRaises(ValueError):
+            storage.rollback()
+
+    def test_5_import_records(self):
+        """Tests creating objects in bulk and exporting them."""
+        self.resetStorage()
+        records = [{"place_id": "p{}".format(i), "text": i}
+                   for i in range(5)]
+        records.append({"id": "r6", "created_at": "2020-01-02T03:04:05",
+                        "updated_at": "2020-01-02T03:04:05"})
+        self.assertEqual(storage.import_records("Review", records), 6)
+        self.assertEqual(storage.count("Review"), 6)
+        self.assertEqual(storage.all()["Review.r6"].created_at,
+                         datetime(2020, 1, 2, 3, 4, 5))
+        self.assertEqual(list(storage.lookup("Review", "place_id", "p3")),
+                         ["Review." + storage.query(
+                             "Review", [("place_id", "==", "p3")])[0].id])
+        exported = list(storage.export_records("Review"))
+        self.assertEqual(exported, [fno.to_dict() for fno in
+                                    storage.all("Review").values()])
+        self.assertEqual(sorted(fnd["text"] for fnd in exported[:5]),
+                         ["0", "1", "2", "3", "4"])
+        storage.reload()
+        self.assertEqual(list(storage.export_records("Review")), exported)
+
+    def test_5_update_where(self):
+        """Tests updating the matching objects at once."""
+        self.resetStorage()
+        fnps = [storage.classes()["Place"]() for i in range(6)]
+        for i, fnp in enumerate(fnps):
+            fnp.city_id = "c{}".format(i % 2)
+            fnp.price_by_night = i
+        before = fnps[1].updated_at
+        self.assertEqual(storage.update_where(
+            "Place", [("city_id", "==", "c1"), ("price_by_night", ">", 1)],
+            {"price_by_night": "120", "amenity_ids": ["wifi"],
+             "city_id": "c2"}), 2)
+        self.assertEqual([fnp.price_by_night for fnp in fnps],
+                         [0, 1, 2, 120, 4, 120])
+        self.assertEqual(fnps[3].updated_at, fnps[5].updated_at)
+        self.assertEqual(fnps[1].updated_at, before)
+        fnps[3].amenity_ids.append("pool")
+        self.assertEqual(fnps[5].amenity_ids, ["wifi"])
+        self.assertEqual(list(storage.lookup("Place", "city_id", "c2")),
+                         ["Place." + fnps[3].id, "Place." + fnps[5].id])
+        storage.reload()
+        self.assertEqual(storage.all()["Place." + fnps[5].id].city_id, "c2")
+        self.assertEqual(storage.update_where("Place", [], {}), 6)
+        self.assertEqual(storage.update_where(
+            "Place", [("city_id", "==", "c9")], {"name": "x"}), 0)
+        with self.assertRaises(ValueError):
+            storage.update_where("Place", [], {"max_guest": "many"})
+        with self.assertRaises(ValueError):
+            storage.update_where("Place", [], {"id": "1"})
+
+    def test_5_cascades(self):
+        """Tests the foreign keys followed by cascading deletes."""
+        self.assertEqual(storage.cascades(),
+                         {"State": (("City", "state_id"),),
+                          "City": (("Place", "city_id"),),
+                          "Place": (("Review", "place_id"),)})
+
+    def test_5_destroy_where(self):
+        """Tests deleting matching objects, with and without cascade."""
+        self.resetStorage()
+        classes = storage.classes()
+        tree = {}
+        for i in range(2):
+            fns = classes["State"]()
+            fns.name = "s{}".format(i)
+            tree[fns] = []
+            for j in range(2):
+                fnc = classes["City"]()
+                fnc.state_id = fns.id
+                fnp = classes["Place"]()
+                fnp.city_id = fnc.id
+                fnr = classes["Review"]()
+                fnr.place_id = fnp.id
+                tree[fns] += [fnc, fnp, fnr]
+        fnu = classes["User"]()
+        kept = [fnu] + list(tree)[1:] + tree[list(tree)[1]]
+        self.assertEqual(storage.destroy_where(
+            "Review", [("place_id", "==", tree[list(tree)[0]][1].id)]), 1)
+        self.assertEqual(storage.count("Review"), 3)
+        self.assertEqual(storage.count("Place"), 4)
+        with patch.object(type(storage), "lookup",
+                          wraps=storage.lookup) as m:
+            self.assertEqual(storage.destroy_where(
+                "State", [("name", "==", "s0")], cascade=True), 6)
+        self.assertEqual(m.call_count, 5)
+        self.assertEqual(sorted(storage.all()), sorted(
+            "{}.{}".format(type(fno).__name__, fno.id) for fno in kept))
+        storage.reload()
+        self.assertEqual(storage.count(), len(kept))
+        self.assertEqual(storage.destroy_where("State", [], cascade=True),
+                         7)
+        self.assertEqual(list(storage.all()), ["User." + fnu.id])
+        self.assertEqual(storage.destroy_where("State", []), 0)
+        fnp = classes["Place"]()
+        fnp.user_id = fnu.id
+        self.assertEqual(storage.destroy_where("User", [], cascade=True), 1)
+        self.assertEqual(list(storage.all()), ["Place." + fnp.id])
+
+    def test_5_lookup(self):
+        """Tests lookup() on indexed and plain attributes."""
+        self.resetStorage()
+        classes = storage.classes()
+        fnrs = [classes["Review"]() for i in range(6)]
+        for i, fnr in enumerate(fnrs):
+            fnr.place_id = "p{}".format(i % 2)
+            fnr.text = "t{}".format(i % 3)
+        self.assertEqual(list(storage.lookup("Review", "place_id", "p0")),
+                         ["Review." + fnr.id for fnr in fnrs[::2]])
+        self.assertEqual(list(storage.lookup("Review", "text", "t1")),
+                         ["Review." + fnr.id for fnr in fnrs[1::3]])
+        fnrs[0].place_id = "p1"
+        new = classes["Review"]()
+        new.place_id = "p0"
+        storage.delete(fnrs[2])
+        self.assertEqual(list(storage.lookup("Review", "place_id", "p0")),
+                         ["Review." + fnrs[4].id, "Review." + new.id])
+        self.assertEqual(len(storage.lookup("Review", "place_id", "p1")), 4)
+        self.assertEqual(storage.lookup("Review", "place_id", "p9"), {})
+        self.assertEqual(len(storage.lookup("Review", "place_id", "")), 0)
+
+    def test_5_lookup_after_reload(self):
+        """Tests lookup() against reloaded objects."""
+        self.resetStorage()
+        fnc = storage.classes()["City"]()
+        fnc.state_id = "s1"
+        storage.save()
+        self.assertEqual(len(storage.lookup("City", "state_id", "s1")), 1)
+        storage.reload()
+        fnd = storage.lookup("City", "state_id", "s1")
+        self.assertEqual(list(fnd), ["City." + fnc.id])
+        self.assertIsNot(fnd["City." + fnc.id], fnc)
+
+    def test_5_lookup_after_replace(self):
+        """Tests lookup() once an object was replaced under its key."""
+        self.resetStorage()
+        classes = storage.classes()
+        fncs = [classes["City"]() for i in range(2)]
+        fnp = classes["Place"]()
+        fnp.city_id = fncs[0].id
+        storage.save()
+        self.assertEqual(len(storage.lookup("Place", "city_id",
+                                            fncs[0].id)), 1)
+        storage.import_records("Place", [{"id": fnp.id,
+                                          "city_id": fncs[1].id}])
+        self.assertEqual(storage.lookup("Place", "city_id", fncs[0].id), {})
+        self.assertEqual(list(storage.lookup("Place", "city_id",
+                                             fncs[1].id)),
+                         ["Place." + fnp.id])
+        storage.destroy_where("City", [("id", "==", fncs[0].id)],
+                              cascade=True)
+        self.assertIn("Place." + fnp.id, storage.all())
+
+    def help_make_places(self):
+        """Creates places spread over two cities."""
+        self.resetStorage()
+        fnps = []
+        for i in range(10):
+            fnp = storage.classes()["Place"]()
+            fnp.city_id = "c{}".format(i % 2)
+            fnp.price_by_night = 100 - i
+            fnps.append(fnp)
+        return fnps
+
+    def test_5_query(self):
+        """Tests query() conditions."""
+        fnps = self.help_make_places()
+        self.assertEqual(storage.query("Place"), fnps)
+        self.assertEqual(storage.query("Place", [("city_id", "==", "c1")]),
+                         fnps[1::2])
+        self.assertEqual(storage.query("Place", [("price_by_night", ">", 97),
+                                                 ("city_id", "!=", "c1")]),
+                         [fnps[0], fnps[2]])
+        self.assertEqual(storage.query("City", [("name", "==", "x")]), [])
+
+    def test_5_query_order_and_limit(self):
+        """Tests query() ordering, limit and offset."""
+        fnps = self.help_make_places()
+        where = [("city_id", "==", "c0")]
+        self.assertEqual(storage.query("Place", where, "price_by_night"),
+                         fnps[8::-2])
+        self.assertEqual(
+            storage.query("Place", where, "price_by_night", limit=2),
+            [fnps[8], fnps[6]])
+        self.assertEqual(
+            storage.query("Place", where, "-price_by_night", 2, 1),
+            [fnps[2], fnps[4]])
+        self.assertEqual(storage.query("Place", limit=3, offset=8),
+                         fnps[8:])
+
+    def test_5_query_defaults(self):
+        """Tests that attributes never set compare as the model defaults,
+        alike on every engine."""
+        self.resetStorage()
+        fnps = [storage.classes()["Place"]() for i in range(3)]
+        fnps[1].price_by_night = 50
+        fnps[2].name = "b"
+        storage.save()
+        storage.reload()
+        fnks = ["Place." + fnp.id for fnp in fnps]
+        where = [("price_by_night", "==", 0)]
+        self.assertEqual([fnp.id for fnp in storage.query("Place", where)],
+                         [fnps[0].id, fnps[2].id])
+        self.assertEqual(
+            [fnp.id for fnp in storage.query("Place", [], "-name")],
+            [fnps[2].id, fnps[0].id, fnps[1].id])
+        self.assertEqual(storage.update_where("Place", where,
+                                              {"max_guest": 2}), 2)
+        self.assertEqual(storage.destroy_where(
+            "Place", [("max_guest", "==", 0)]), 1)
+        self.assertEqual(sorted(storage.all()), sorted(fnks[::2]))
+
+    def test_5_query_early_termination(self):
+        """Tests that query() stops scanning once limit is reached."""
+        self.help_make_places()
+        with patch.object(FileStorage, "_FileStorage__value",
+                          autospec=True,
+                          side_effect=FileStorage._FileStorage__value) as m:
+            storage.query("Place", [("price_by_night", "<=", 100)], limit=2)
+        self.assertEqual(m.call_count, 2)
+
     def help_test_new(self, classname):
         """Helps tests new() method for classname."""
         self.resetStorage()
@@ -161,8 +524,8 @@ class TestFileStorage(unittest.TestCase):
         fno = cls()
         storage.new(fno)
         key = "{}.{}".format(type(fno).__name__, fno.id)
-        self.assertTrue(key in FileStorage._FileStorage__objects)
-        self.assertEqual(FileStorage._FileStorage__objects[key], fno)
+        self.assertTrue(key in storage.all())
+        self.assertEqual(storage.all()[key], fno)
 
     def test_5_new_base_model(self):
         """Tests new() method for BaseModel."""
@@ -257,7 +620,7 @@ class TestFileStorage(unittest.TestCase):
         """Tests save() with no arguments."""
         self.resetStorage()
         with self.assertRaises(TypeError) as e:
-            FileStorage.save()
+            self.engine.save()
         fnmsg = "save() missing 1 required positional argument: 'self'"
         self.assertEqual(str(e.exception), fnmsg)
 
@@ -265,7 +628,7 @@ class TestFileStorage(unittest.TestCase):
         """Tests save() with too many arguments."""
         self.resetStorage()
         with self.assertRaises(TypeError) as e:
-            FileStorage.save(self, 98)
+            self.engine.save(self, 98)
         fnmsg = "save() takes 1 positional argument but 2 were given"
         self.assertEqual(str(e.exception), fnmsg)
 
@@ -273,7 +636,7 @@ class TestFileStorage(unittest.TestCase):
         """Helps test reload() method for classname."""
         self.resetStorage()
         storage.reload()
-        self.assertEqual(FileStorage._FileStorage__objects, {})
+        self.assertEqual(storage.all(), {})
         cls = storage.classes()[classname]
         fno = cls()
         storage.new(fno)
@@ -314,7 +677,7 @@ class TestFileStorage(unittest.TestCase):
         """Helps test reload() method for classname."""
         self.resetStorage()
         storage.reload()
-        self.assertEqual(FileStorage._FileStorage__objects, {})
+        self.assertEqual(storage.all(), {})
 
         cls = storage.classes()[classname]
         fno = cls()
@@ -357,7 +720,7 @@ class TestFileStorage(unittest.TestCase):
         """Tests reload() with no arguments."""
         self.resetStorage()
         with self.assertRaises(TypeError) as e:
-            FileStorage.reload()
+            self.engine.reload()
         fnmsg = "reload() missing 1 required positional argument: 'self'"
         self.assertEqual(str(e.exception), fnmsg)
 
@@ -365,10 +728,1043 @@ class TestFileStorage(unittest.TestCase):
         """Tests reload() with too many arguments."""
         self.resetStorage()
         with self.assertRaises(TypeError) as e:
-            FileStorage.reload(self, 98)
+            self.engine.reload(self, 98)
         fnmsg = "reload() takes 1 positional argument but 2 were given"
         self.assertEqual(str(e.exception), fnmsg)
 
+    def test_5_save_encodes_dirty_only(self):
+        """Tests that save() only encodes objects changed since the last."""
+        self.resetStorage()
+        fnos = [BaseModel() for i in range(10)]
+        storage.save()
+        fnos[2].name = "Betty"
+        fnos[5].number = 5
+        fnos.append(BaseModel())
+        storage.delete(fnos[0])
+        with patch.object(BaseModel, "to_dict",
+                          autospec=True, side_effect=BaseModel.to_dict) as m:
+            storage.save()
+        self.assertEqual(sorted(c.args[0].id for c in m.call_args_list),
+                         sorted(fno.id
+                                for fno in (fnos[2], fnos[5], fnos[10])))
+        fnd = {"BaseModel." + fno.id: fno.to_dict() for fno in fnos[1:]}
+        with open(FileStorage._FileStorage__file_path,
+                  "r", encoding="utf-8") as fnf:
+            self.assertEqual(fnf.read(), json.dumps(fnd))
+
+    def test_5_save_storage_after_in_place_change(self):
+        """Tests that storage.save() picks up in-place changes of lists."""
+        self.resetStorage()
+        fno = storage.classes()["Place"]()
+        fno.amenity_ids = []
+        storage.save()
+        fno.amenity_ids.append("A1")
+        storage.save()
+        storage.reload()
+        self.assertEqual(storage.all()["Place." + fno.id].amenity_ids,
+                         ["A1"])
+
+    def test_5_save_after_in_place_change(self):
+        """Tests that save() on the instance picks up in-place changes."""
+        self.resetStorage()
+        fno = storage.classes()["Place"]()
+        fno.amenity_ids = []
+        storage.save()
+        fno.amenity_ids.append("wifi")
+        fno.save()
+        storage.reload()
+        self.assertEqual(storage.all()["Place." + fno.id].amenity_ids,
+                         ["wifi"])
+
+
+class TestFileStorageJournal(unittest.TestCase):
+    """Test Cases for the journal mode of FileStorage."""
+
+    def setUp(self):
+        """Sets up test methods."""
+        self.resetStorage()
+        FileStorage.journal = True
+
+    def tearDown(self):
+        """Tears down test methods."""
+        FileStorage.journal = False
+        FileStorage.compact_after = 1000
+        self.resetStorage()
+
+    def resetStorage(self):
+        """Resets FileStorage data and its journal."""
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__changes = {}
+        fnp = FileStorage._FileStorage__file_path
+        for path in (fnp, fnp + ".log", fnp + ".log.1", fnp + ".tmp"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def journal_lines(self):
+        """Returns the records currently in the journal."""
+        path = FileStorage._FileStorage__file_path + ".log"
+        if not os.path.isfile(path):
+            return []
+        with open(path, "r", encoding="utf-8") as fnf:
+            return [json.loads(line) for line in fnf]
+
+    def test_save_appends_changed_only(self):
+        """Tests that save() appends one record per changed object."""
+        fnos = [BaseModel() for i in range(10)]
+        storage.save()
+        self.assertEqual(len(self.journal_lines()), 10)
+        fnos[3].name = "Betty"
+        fnos[3].save()
+        records = self.journal_lines()
+        self.assertEqual(len(records), 11)
+        self.assertEqual(records[-1]["op"], "put")
+        self.assertEqual(records[-1]["obj"]["name"], "Betty")
+        self.assertFalse(
+            os.path.isfile(FileStorage._FileStorage__file_path))
+
+    def test_reload_replays_journal(self):
+        """Tests that reload() replays puts and deletes."""
+        fnb1 = BaseModel()
+        fnb2 = BaseModel()
+        storage.save()
+        fnb1.name = "Betty"
+        fnb1.save()
+        storage.delete(fnb2)
+        storage.save()
+        self.assertEqual(self.journal_lines()[-1]["op"], "delete")
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(list(storage.all()), ["BaseModel." + fnb1.id])
+        self.assertEqual(storage.all()["BaseModel." + fnb1.id].name, "Betty")
+
+    def test_reload_ignores_torn_record(self):
+        """Tests that an interrupted append is dropped on reload."""
+        fnb = BaseModel()
+        storage.save()
+        path = FileStorage._FileStorage__file_path + ".log"
+        with open(path, "a", encoding="utf-8") as fnf:
+            fnf.write('{"op": "put", "key": "BaseModel.x", "ob')
+        storage.reload()
+        self.assertEqual(list(storage.all()), ["BaseModel." + fnb.id])
+        fnb2 = BaseModel()
+        storage.save()
+        storage.reload()
+        self.assertEqual(len(storage.all()), 2)
+
+    def test_compact(self):
+        """Tests that compact() folds the journal into the snapshot."""
+        fnos = [BaseModel() for i in range(5)]
+        storage.save()
+        storage.delete(fnos[0])
+        storage.save()
+        storage.compact(background=False)
+        fnp = FileStorage._FileStorage__file_path
+        self.assertFalse(os.path.isfile(fnp + ".log"))
+        self.assertFalse(os.path.isfile(fnp + ".log.1"))
+        with open(fnp, "r", encoding="utf-8") as fnf:
+            self.assertEqual(len(json.load(fnf)), 4)
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(len(storage.all()), 4)
+
+    def test_background_compaction(self):
+        """Tests that a long journal triggers a background compaction."""
+        FileStorage.compact_after = 3
+        fnos = [BaseModel() for i in range(3)]
+        storage.save()
+        FileStorage._FileStorage__compactor.join()
+        fnos[0].save()
+        self.assertEqual(len(self.journal_lines()), 1)
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(len(storage.all()), 3)
+
+
+class TestFileStorageWriteBehind(unittest.TestCase):
+    """Test Cases for the write-behind mode of FileStorage."""
+
+    def setUp(self):
+        """Sets up test methods."""
+        self.resetStorage()
+        FileStorage.write_behind = True
+        FileStorage.flush_after = 5
+        FileStorage.flush_interval = 0
+
+    def tearDown(self):
+        """Tears down test methods."""
+        storage.flush()
+        FileStorage.write_behind = False
+        FileStorage.flush_after = 100
+        FileStorage.flush_interval = 1.0
+        self.resetStorage()
+
+    def resetStorage(self):
+        """Resets FileStorage data."""
+        FileStorage._FileStorage__objects = {}
+        if os.path.isfile(FileStorage._FileStorage__file_path):
+            os.remove(FileStorage._FileStorage__file_path)
+
+    def saved(self):
+        """Returns the number of objects in the file."""
+        if not os.path.isfile(FileStorage._FileStorage__file_path):
+            return None
+        with open(FileStorage._FileStorage__file_path,
+                  "r", encoding="utf-8") as fnf:
+            return len(json.load(fnf))
+
+    def test_flush_after(self):
+        """Tests that the file is written every flush_after saves."""
+        for i in range(4):
+            BaseModel().save()
+        self.assertIsNone(self.saved())
+        BaseModel().save()
+        self.assertEqual(self.saved(), 5)
+        BaseModel().save()
+        self.assertEqual(self.saved(), 5)
+
+    def test_flush(self):
+        """Tests that flush() writes pending saves only."""
+        BaseModel().save()
+        storage.flush()
+        self.assertEqual(self.saved(), 1)
+        os.remove(FileStorage._FileStorage__file_path)
+        storage.flush()
+        self.assertIsNone(self.saved())
+
+    def test_flush_interval(self):
+        """Tests that pending saves are written after flush_interval."""
+        FileStorage.flush_interval = 0.05
+        BaseModel().save()
+        self.assertIsNone(self.saved())
+        time.sleep(0.3)
+        self.assertEqual(self.saved(), 1)
+
+    def test_console_quit(self):
+        """Tests that quitting the console flushes."""
+        from console import HBNBCommand
+        with patch('sys.stdout'):
+            HBNBCommand().onecmd("create User")
+            self.assertIsNone(self.saved())
+            HBNBCommand().onecmd("quit")
+        self.assertEqual(self.saved(), 1)
+
+
+class TemporaryFileTestCase(unittest.TestCase):
+    """Base of the test cases pointing FileStorage at a temporary file."""
+
+    def setUp(self):
+        """Points FileStorage at file.json in a temporary directory."""
+        self.path = FileStorage._FileStorage__file_path
+        self.tmpdir = tempfile.mkdtemp()
+        FileStorage._FileStorage__file_path = os.path.join(self.tmpdir,
+                                                           "file.json")
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Points FileStorage back at its file, dropping the directory."""
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__file_path = self.path
+        shutil.rmtree(self.tmpdir)
+
+
+class TestFileStorageDurability(TemporaryFileTestCase):
+    """Crash injection tests for the save path of FileStorage."""
+
+    def setUp(self):
+        """Saves an old state to a temporary file."""
+        super().setUp()
+        for i in range(3):
+            BaseModel()
+        storage.save()
+        self.old = self.state()
+
+    def tearDown(self):
+        """Tears down test methods."""
+        FileStorage.durability = "atomic"
+        super().tearDown()
+
+    def state(self):
+        """Returns the keys reloaded from the file."""
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        return sorted(storage.all())
+
+    def crash(self, target, durability):
+        """Saves a new state while target raises, then checks the file."""
+        FileStorage.durability = durability
+        storage.reload()
+        BaseModel()
+        new = sorted(storage.all())
+        with patch(target, side_effect=RuntimeError("crash")):
+            with self.assertRaises(RuntimeError):
+                storage.save()
+        self.assertIn(self.state(), (self.old, new))
+        self.assertEqual(os.listdir(self.tmpdir), ["file.json"])
+        return new
+
+    def test_crash_before_rename(self):
+        """Tests that a failed rename leaves the old state."""
+        for durability in ("atomic", "durable"):
+            self.crash("os.replace", durability)
+            self.assertEqual(self.state(), self.old)
+
+    def test_crash_in_fsync(self):
+        """Tests that a failed fsync leaves the old or the new state."""
+        self.crash("os.fsync", "durable")
+
+    def test_crash_in_dump(self):
+        """Tests that a failed encoding leaves the old state."""
+        for durability in ("fast", "atomic", "durable"):
+            self.crash("json.dumps", durability)
+            self.assertEqual(self.state(), self.old)
+
+    def test_unknown_durability(self):
+        """Tests that an unknown durability is refused, not taken for
+        atomic."""
+        FileStorage.set_durability("durable")
+        self.assertEqual(FileStorage.durability, "durable")
+        with self.assertRaisesRegex(ValueError, "durabel"):
+            FileStorage.set_durability("durabel")
+        self.assertEqual(FileStorage.durability, "durable")
+        FileStorage.durability = "durabel"
+        BaseModel()
+        with self.assertRaises(ValueError):
+            storage.save()
+        self.assertEqual(self.state(), self.old)
+
+    def test_killed_mid_write(self):
+        """Tests that a process killed while writing leaves the old state."""
+        code = "\n".join([
+            "import os, sys",
+            "from unittest.mock import patch",
+            "from models import storage",
+            "from models.engine.file_storage import FileStorage",
+            "from models.base_model import BaseModel",
+            "FileStorage._FileStorage__file_path = sys.argv[1]",
+            "FileStorage.durability = sys.argv[2]",
+            "storage.reload()",
+            "BaseModel()",
+            "real = open",
+            "class Torn:",
+            "    def __init__(self, *args, **kwargs):",
+            "        self.fnf = real(*args, **kwargs)",
+            "    def __enter__(self):",
+            "        return self",
+            "    def __exit__(self, *args):",
+            "        self.fnf.close()",
+            "    def write(self, fns):",
+            "        self.fnf.write(fns[:len(fns) // 2])",
+            "        self.fnf.flush()",
+            "        os._exit(9)",
+            "with patch('models.engine.file_storage.open', Torn,",
+            "           create=True):",
+            "    storage.save()"])
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        for durability in ("atomic", "durable"):
+            fnp = subprocess.run(
+                [sys.executable, "-c", code,
+                 FileStorage._FileStorage__file_path, durability],
+                cwd=self.tmpdir, env=dict(os.environ, PYTHONPATH=root))
+            self.assertEqual(fnp.returncode, 9)
+            self.assertEqual(self.state(), self.old)
+
+
+class TestFileStorageLazy(unittest.TestCase):
+    """Test Cases for the lazy reload mode of FileStorage."""
+
+    def setUp(self):
+        """Sets up test methods."""
+        self.resetStorage()
+        self.fnos = [storage.classes()[name]()
+                     for name in ("User", "Place", "Review")]
+        self.fnos[1].name = "Loft"
+        storage.save()
+        with open(FileStorage._FileStorage__file_path,
+                  "r", encoding="utf-8") as fnf:
+            self.saved = fnf.read()
+        FileStorage.lazy = True
+        storage.reload()
+
+    def tearDown(self):
+        """Tears down test methods."""
+        FileStorage.lazy = False
+        self.resetStorage()
+
+    def resetStorage(self):
+        """Resets FileStorage data."""
+        FileStorage._FileStorage__objects = {}
+        if os.path.isfile(FileStorage._FileStorage__file_path):
+            os.remove(FileStorage._FileStorage__file_path)
+
+    def test_reload_builds_nothing(self):
+        """Tests that reload() keeps raw records only."""
+        fnd = storage.all()
+        self.assertEqual(len(fnd), 3)
+        for fno in self.fnos:
+            key = "{}.{}".format(type(fno).__name__, fno.id)
+            self.assertIn(key, fnd)
+            self.assertFalse(fnd.is_loaded(key))
+
+    def test_access_builds_instance(self):
+        """Tests that looking a key up builds its instance once."""
+        key = "Place." + self.fnos[1].id
+        fno = storage.all()[key]
+        self.assertEqual(type(fno).__name__, "Place")
+        self.assertEqual(fno.to_dict(), self.fnos[1].to_dict())
+        self.assertIs(storage.all().get(key), fno)
+        self.assertTrue(storage.all().is_loaded(key))
+        self.assertFalse(storage.all().is_loaded("User." + self.fnos[0].id))
+
+    def test_items_and_copies_build_instances(self):
+        """Tests that iterating values or copying never leaks records."""
+        for fno in dict(storage.all()).values():
+            self.assertIsInstance(fno, BaseModel)
+        for fnk, fno in storage.all().items():
+            self.assertIsInstance(fno, BaseModel)
+
+    def test_save_without_access(self):
+        """Tests that save() writes records that were never built."""
+        storage.all()["User." + self.fnos[0].id].first_name = "Betty"
+        storage.save()
+        fnd = json.loads(self.saved)
+        fnd["User." + self.fnos[0].id]["first_name"] = "Betty"
+        with open(FileStorage._FileStorage__file_path,
+                  "r", encoding="utf-8") as fnf:
+            saved = json.load(fnf)
+        fnd["User." + self.fnos[0].id]["updated_at"] = \
+            saved["User." + self.fnos[0].id]["updated_at"]
+        self.assertEqual(saved, fnd)
+        self.assertFalse(storage.all().is_loaded("Place." + self.fnos[1].id))
+
+    def test_delete(self):
+        """Tests that delete() works on records never built."""
+        fno = storage.all()["Review." + self.fnos[2].id]
+        storage.delete(fno)
+        self.assertEqual(len(storage.all()), 2)
+
+    def test_query_timestamps(self):
+        """Tests comparing timestamps of records never built."""
+        fnps = [self.fnos[1]] + [storage.classes()["Place"]()
+                                 for i in range(3)]
+        storage.save()
+        keys = ["Place." + fno.id for fno in fnps]
+
+        def query(*args, **kwargs):
+            """returns the keys the query finds after a reload"""
+            storage.reload()
+            self.assertFalse(any(storage.all().is_loaded(fnk)
+                                 for fnk in keys))
+            storage.all()[keys[2]]
+            return ["Place." + fno.id
+                    for fno in storage.query("Place", *args, **kwargs)]
+        self.assertEqual(query(order_by="created_at"), keys)
+        self.assertEqual(query([("created_at", ">", fnps[1].created_at)]),
+                         keys[2:])
+        self.assertEqual(query([("created_at", "==", fnps[3].created_at)]),
+                         keys[3:])
+
+
+class TestFileStorageMapped(unittest.TestCase):
+    """Test Cases for the mapped snapshot mode of FileStorage."""
+
+    def setUp(self):
+        """Sets up test methods."""
+        self.resetStorage()
+        self.fnos = [storage.classes()[name]()
+                     for name in ("User", "Place", "Review", "Review")]
+        self.fnos[1].name = "Loft"
+        self.fnos[2].place_id = self.fnos[1].id
+        storage.snapshot()
+        FileStorage.mapped = True
+        storage.reload()
+
+    def tearDown(self):
+        """Tears down test methods."""
+        FileStorage.mapped = False
+        self.resetStorage()
+
+    def resetStorage(self):
+        """Resets FileStorage data and its snapshot."""
+        FileStorage._FileStorage__objects = {}
+        fnp = FileStorage._FileStorage__file_path
+        for path in (fnp, fnp + ".snap"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def test_reload_builds_nothing(self):
+        """Tests that reload() maps the snapshot without decoding it."""
+        fnd = storage.all()
+        self.assertEqual(len(fnd), 4)
+        self.assertEqual(storage.count("Review"), 2)
+        for fno in self.fnos:
+            key = "{}.{}".format(type(fno).__name__, fno.id)
+            self.assertIn(key, fnd)
+            self.assertFalse(fnd.is_loaded(key))
+        self.assertNotIn("User.missing", fnd)
+
+    def test_access_builds_instance(self):
+        """Tests that looking a key up builds its instance once."""
+        key = "Place." + self.fnos[1].id
+        fno = storage.all()[key]
+        self.assertEqual(type(fno).__name__, "Place")
+        self.assertEqual(fno.to_dict(), self.fnos[1].to_dict())
+        self.assertIs(storage.all().get(key), fno)
+        self.assertEqual(sorted(fno.id for fno in storage.all().values()),
+                         sorted(fno.id for fno in self.fnos))
+        with self.assertRaises(KeyError):
+            storage.all()["Place.missing"]
+
+    def test_lookup_and_query(self):
+        """Tests that lookup() and query() read the mapped records."""
+        fnd = storage.lookup("Review", "place_id", self.fnos[1].id)
+        self.assertEqual(list(fnd), ["Review." + self.fnos[2].id])
+        self.assertEqual(
+            [fno.id for fno in storage.query("Place",
+                                             [("name", "==", "Loft")])],
+            [self.fnos[1].id])
+        self.assertFalse(storage.all().is_loaded("User." + self.fnos[0].id))
+
+    def test_writes_refused(self):
+        """Tests that writes are refused before anything changes."""
+        fnr = storage.all()["Review." + self.fnos[3].id]
+        with self.assertRaises(io.UnsupportedOperation):
+            storage.classes()["User"]()
+        with self.assertRaises(io.UnsupportedOperation):
+            storage.delete(fnr)
+        with self.assertRaises(io.UnsupportedOperation):
+            fnr.text = "Great"
+        with self.assertRaises(io.UnsupportedOperation):
+            storage.save()
+        self.assertEqual(storage.count(), 4)
+        self.assertEqual(len(list(storage.all())), 4)
+        self.assertIs(storage.all()["Review." + self.fnos[3].id], fnr)
+        self.assertNotEqual(fnr.text, "Great")
+
+    def test_snapshot_of_mapped(self):
+        """Tests that snapshot() rewrites a mapped snapshot."""
+        saved = {fnk: fno.to_dict() for fnk, fno in storage.all().items()}
+        storage.snapshot()
+        storage.reload()
+        self.assertFalse(storage.all().is_loaded("User." + self.fnos[0].id))
+        self.assertEqual({fnk: fno.to_dict()
+                          for fnk, fno in storage.all().items()}, saved)
+
+    def test_without_snapshot(self):
+        """Tests that reload() falls back on the file without a snapshot."""
+        fnp = FileStorage._FileStorage__file_path
+        fnd = {"User." + self.fnos[0].id: self.fnos[0].to_dict()}
+        with open(fnp, "w", encoding="utf-8") as fnf:
+            json.dump(fnd, fnf)
+        os.remove(fnp + ".snap")
+        storage.reload()
+        self.assertIs(type(storage.all()), dict)
+        self.assertEqual(list(storage.all()), list(fnd))
+
+    def test_stale_snapshot(self):
+        """Tests that reload() reads the file once written after the
+        snapshot, and maps the snapshot again once retaken."""
+        fnd = {"User." + self.fnos[0].id: self.fnos[0].to_dict()}
+        with open(FileStorage._FileStorage__file_path, "w",
+                  encoding="utf-8") as fnf:
+            json.dump(fnd, fnf)
+        storage.reload()
+        self.assertIs(type(storage.all()), dict)
+        self.assertEqual(list(storage.all()), list(fnd))
+        storage.snapshot()
+        storage.reload()
+        self.assertIsNot(type(storage.all()), dict)
+        self.assertEqual(list(storage.all()), list(fnd))
+
+
+class TestFileStorageShared(TemporaryFileTestCase):
+    """Test Cases for the shared mode of FileStorage."""
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__)))))
+
+    def setUp(self):
+        """Saves places to a temporary file in shared mode."""
+        super().setUp()
+        FileStorage.shared = True
+        self.fnps = [storage.classes()["Place"]() for i in range(3)]
+        storage.save()
+
+    def tearDown(self):
+        """Tears down test methods."""
+        FileStorage.shared = False
+        FileStorage._FileStorage__changes = {}
+        FileStorage._FileStorage__versions = {}
+        FileStorage._FileStorage__seen = None
+        super().tearDown()
+
+    def other(self, *lines, args=()):
+        """Runs lines in another process sharing the file."""
+        code = "\n".join(("import sys",
+                          "from models import storage") + lines)
+        fnp = subprocess.run(
+            [sys.executable, "-c", code] + list(args),
+            cwd=self.tmpdir, stdout=subprocess.PIPE, check=True,
+            env=dict(os.environ, PYTHONPATH=self.root,
+                     HBNB_STORAGE_SHARED="1"))
+        return fnp.stdout.decode()
+
+    def place(self, i):
+        """Returns the key of place i."""
+        return "Place." + self.fnps[i].id
+
+    def test_reads_pick_up_writes(self):
+        """Tests that reads see what another process saved."""
+        self.other("fno = storage.all()[sys.argv[1]]",
+                   "fno.name = 'Loft'",
+                   "fno.save()",
+                   "storage.classes()['City']().save()",
+                   "storage.delete(storage.all()[sys.argv[2]])",
+                   "storage.save()",
+                   args=(self.place(0), self.place(2)))
+        self.assertEqual(storage.all()[self.place(0)].name, "Loft")
+        self.assertEqual(storage.count("City"), 1)
+        self.assertNotIn(self.place(2), storage.all())
+        self.assertIs(storage.all()[self.place(1)], self.fnps[1])
+
+    def test_save_merges(self):
+        """Tests that save() keeps what another process saved."""
+        self.other("fno = storage.all()[sys.argv[1]]",
+                   "fno.name = 'Theirs'",
+                   "fno.save()",
+                   args=(self.place(0),))
+        self.fnps[1].name = "Mine"
+        FileStorage._FileStorage__objects[self.place(1)].save()
+        FileStorage._FileStorage__objects = {}
+        FileStorage.shared = False
+        storage.reload()
+        self.assertEqual(storage.all()[self.place(0)].name, "Theirs")
+        self.assertEqual(storage.all()[self.place(1)].name, "Mine")
+
+    def test_conflict(self):
+        """Tests that save() refuses objects changed on both sides."""
+        self.fnps[0].name = "Mine"
+        self.fnps[1].name = "Mine too"
+        self.other("fno = storage.all()[sys.argv[1]]",
+                   "fno.name = 'Theirs'",
+                   "fno.save()",
+                   args=(self.place(0),))
+        with self.assertRaises(ConflictError) as e:
+            storage.save()
+        self.assertEqual(e.exception.keys, [self.place(0)])
+        self.assertEqual(storage.all()[self.place(0)].name, "Theirs")
+        storage.save()
+        self.assertEqual(self.other(
+            "print(storage.all()[sys.argv[1]].name)",
+            "print(storage.all()[sys.argv[2]].name)",
+            args=(self.place(0), self.place(1))), "Theirs\nMine too\n")
+
+    def test_conflict_read_before_save(self):
+        """Tests conflicts picked up by a read before the save."""
+        for i, line in ((0, "fno.name = 'Loft'; fno.save()"),
+                        (1, "storage.delete(fno); storage.save()")):
+            storage.all()[self.place(i)].name = "Barn"
+            self.other("fno = storage.all()[sys.argv[1]]", line,
+                       args=(self.place(i),))
+            self.assertIn(self.place(2), storage.all())
+            with self.assertRaises(ConflictError):
+                storage.save()
+        self.assertEqual(storage.all()[self.place(0)].name, "Loft")
+        self.assertNotIn(self.place(1), storage.all())
+
+    def test_reload_without_file(self):
+        """Tests that reload() keeps the objects when no file exists."""
+        FileStorage.shared = False
+        os.remove(FileStorage._FileStorage__file_path)
+        storage.reload()
+        self.assertEqual(sorted(storage.all()),
+                         sorted(self.place(i) for i in range(3)))
+
+    def test_concurrent_updates(self):
+        """Tests that workers updating the same places lose nothing."""
+        worker = (
+            "import contextlib, io, json",
+            "from console import HBNBCommand",
+            "done = {}",
+            "for i in range(20):",
+            "    uid = sys.argv[2 + i % 3]",
+            "    line = 'Place.update(\"{}\", {{\"w{}\": {}}})'",
+            "    fnf = io.StringIO()",
+            "    with contextlib.redirect_stdout(fnf):",
+            "        HBNBCommand().onecmd(line.format(uid, sys.argv[1], i))",
+            "    if not fnf.getvalue():",
+            "        done[uid] = i",
+            "print(json.dumps(done))")
+        code = "\n".join(("import sys",) + worker)
+        workers = [subprocess.Popen(
+            [sys.executable, "-c", code, str(n)] +
+            [fnp.id for fnp in self.fnps],
+            cwd=self.tmpdir, stdout=subprocess.PIPE,
+            env=dict(os.environ, PYTHONPATH=self.root,
+                     HBNB_STORAGE_SHARED="1")) for n in range(4)]
+        done = [json.loads(fnw.communicate()[0]) for fnw in workers]
+        for fnw in workers:
+            self.assertEqual(fnw.returncode, 0)
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        # a worker may lose all its updates to conflicts, not all of them
+        self.assertTrue(any(done))
+        for n, fnd in enumerate(done):
+            for uid, i in fnd.items():
+                self.assertEqual(
+                    getattr(storage.all()["Place." + uid], "w{}".format(n)),
+                    i)
+
+
+class TestFileStorageThreaded(TemporaryFileTestCase):
+    """Test Cases for the threaded mode of FileStorage."""
+
+    def setUp(self):
+        """Points FileStorage at a temporary file in threaded mode."""
+        super().setUp()
+        FileStorage.threaded = True
+
+    def tearDown(self):
+        """Tears down test methods."""
+        storage.flush()
+        FileStorage.threaded = False
+        super().tearDown()
+
+    def saved(self):
+        """Returns the records in the file."""
+        with open(FileStorage._FileStorage__file_path,
+                  "r", encoding="utf-8") as fnf:
+            return json.load(fnf)
+
+    def test_all_copied_on_write(self):
+        """Tests that what all() returned never changes size."""
+        fnb = BaseModel()
+        fnd = storage.all()
+        fnn = BaseModel()
+        self.assertEqual(list(fnd), ["BaseModel." + fnb.id])
+        self.assertIn("BaseModel." + fnn.id, storage.all())
+        self.assertEqual(storage.count(), 2)
+        self.assertEqual(storage.lookup("BaseModel", "id", fnn.id),
+                         {"BaseModel." + fnn.id: fnn})
+
+    def test_iterate_while_inserting(self):
+        """Tests iterating all() while other threads add objects."""
+        errors = []
+
+        def insert():
+            for i in range(2000):
+                BaseModel()
+
+        def iterate():
+            try:
+                for i in range(200):
+                    for fnk, fno in storage.all().items():
+                        pass
+            except RuntimeError as e:
+                errors.append(e)
+        threads = [threading.Thread(target=fnt)
+                   for fnt in (insert, insert, iterate, iterate)]
+        interval = sys.getswitchinterval()
+        # switch threads often enough for the race to show up
+        sys.setswitchinterval(1e-6)
+        try:
+            for fnt in threads:
+                fnt.start()
+            for fnt in threads:
+                fnt.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+        self.assertEqual(storage.count(), 4000)
+
+    def test_concurrent_saves(self):
+        """Tests that saves from many threads all reach the file."""
+        def work(n):
+            for i in range(50):
+                fno = storage.classes()["Place"]()
+                fno.name = "{}-{}".format(n, i)
+                fno.save()
+                fno.number_rooms = i
+                fno.save()
+        threads = [threading.Thread(target=work, args=(n,))
+                   for n in range(4)]
+        for fnt in threads:
+            fnt.start()
+        for fnt in threads:
+            fnt.join()
+        storage.flush()
+        fnd = self.saved()
+        self.assertEqual(len(fnd), 200)
+        self.assertEqual(fnd, {fnk: fno.to_dict()
+                               for fnk, fno in storage.all().items()})
+
+    def test_writer_coalesces_saves(self):
+        """Tests that saves piling up are written together."""
+        with patch.object(FileStorage, "_FileStorage__store",
+                          autospec=True,
+                          side_effect=FileStorage._FileStorage__store) as m:
+            for i in range(100):
+                BaseModel().save()
+            storage.flush()
+        self.assertLess(m.call_count, 100)
+        self.assertEqual(len(self.saved()), 100)
+
+    def test_flush_raises_writer_error(self):
+        """Tests that flush() reports a failed background write."""
+        BaseModel()
+        with patch("json.dumps", side_effect=RuntimeError("disk")):
+            storage.save()
+            with self.assertRaises(RuntimeError):
+                storage.flush()
+        storage.save()
+        storage.flush()
+        self.assertEqual(len(self.saved()), 1)
+
+
+class TestFileStorageParallelReload(TemporaryFileTestCase):
+    """Test Cases for the parallel reload of FileStorage."""
+
+    def setUp(self):
+        """Saves objects of every class to a temporary file."""
+        super().setUp()
+        for i in range(5):
+            for cls in storage.classes().values():
+                cls().name = "name {}".format(i)
+        storage.save()
+        self.saved = {fnk: fno.to_dict()
+                      for fnk, fno in storage.all().items()}
+        FileStorage.reload_workers = 3
+
+    def tearDown(self):
+        """Tears down test methods."""
+        FileStorage.reload_workers = 0
+        FileStorage.journal = False
+        super().tearDown()
+
+    def reloaded(self):
+        """Returns the records of the reloaded objects."""
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        return {fnk: fno.to_dict() for fnk, fno in storage.all().items()}
+
+    def test_reload(self):
+        """Tests that the workers build every object."""
+        with patch("models.engine.serializers.read") as m:
+            self.assertEqual(self.reloaded(), self.saved)
+        m.assert_not_called()
+        for fnk, fno in storage.all().items():
+            self.assertIs(type(fno), storage.classes()[fnk.split(".")[0]])
+            self.assertIsInstance(fno.updated_at, datetime)
+
+    def test_reload_journal(self):
+        """Tests that the journal is replayed over the workers' objects."""
+        FileStorage.journal = True
+        storage.reload()
+        fno = storage.classes()["City"]()
+        fno.state_id = "s1"
+        storage.delete(next(iter(storage.all("User").values())))
+        storage.save()
+        self.assertEqual(self.reloaded(), {
+            fnk: fno.to_dict() for fnk, fno in storage.all().items()})
+        self.assertEqual(storage.all()["City." + fno.id].state_id, "s1")
+
+    def test_reload_boundary_in_strings(self):
+        """Tests values looking like the boundaries the file is cut at."""
+        for fno in storage.all().values():
+            fno.text = '}, "Review.' * 10
+        storage.save()
+        saved = {fnk: fno.to_dict() for fnk, fno in storage.all().items()}
+        for workers in range(2, 8):
+            FileStorage.reload_workers = workers
+            self.assertEqual(self.reloaded(), saved)
+
+    def test_reload_at_import(self):
+        """Tests importing models with the workers set in the environment."""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        for workers in ("2", "4"):
+            fnp = subprocess.run(
+                [sys.executable, "-c",
+                 "from models import storage; print(storage.count())"],
+                cwd=self.tmpdir, stdout=subprocess.PIPE, check=True,
+                timeout=60, env=dict(os.environ, PYTHONPATH=root,
+                                     HBNB_STORAGE_RELOAD_WORKERS=workers))
+            self.assertEqual(int(fnp.stdout), len(self.saved))
+
+    def test_reload_fallback(self):
+        """Tests that a failing pool falls back on a serial reload."""
+        with patch("models.engine.file_storage.ProcessPoolExecutor",
+                   side_effect=OSError("no processes")):
+            self.assertEqual(self.reloaded(), self.saved)
+
+
+class TestFileStorageSharded(TemporaryFileTestCase):
+    """Test Cases for the sharded mode of FileStorage."""
+
+    def setUp(self):
+        """Points FileStorage at a temporary file in the sharded mode."""
+        super().setUp()
+        FileStorage.sharded = True
+
+    def tearDown(self):
+        """Tears down test methods."""
+        FileStorage.sharded = False
+        super().tearDown()
+
+    def shard(self, name):
+        """Returns the path of the shard of class name."""
+        return os.path.join(self.tmpdir, "file.{}.json".format(name))
+
+    def reloaded(self):
+        """Returns the records of the reloaded objects."""
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        return {fnk: fno.to_dict() for fnk, fno in storage.all().items()}
+
+    def test_save(self):
+        """Tests that each class is saved to its own file."""
+        fnu = storage.classes()["User"]()
+        fnp = storage.classes()["Place"]()
+        storage.save()
+        self.assertEqual(sorted(os.listdir(self.tmpdir)),
+                         ["file.Place.json", "file.User.json"])
+        with open(self.shard("User"), "r", encoding="utf-8") as fnf:
+            self.assertEqual(json.load(fnf), {"User." + fnu.id: fnu.to_dict()})
+        saved = {fnk: fno.to_dict() for fnk, fno in storage.all().items()}
+        self.assertEqual(self.reloaded(), saved)
+        self.assertIsInstance(storage.all()["Place." + fnp.id].created_at,
+                              datetime)
+
+    def test_save_dirty_shards(self):
+        """Tests that only the shards of changed classes are rewritten."""
+        fnu = storage.classes()["User"]()
+        storage.classes()["Review"]()
+        storage.save()
+        fnu.email = "a@b.c"
+        with patch.object(FileStorage, "_FileStorage__replace") as m:
+            storage.save()
+        self.assertEqual([c[0][0] for c in m.call_args_list],
+                         [self.shard("User")])
+
+    def test_save_parallel(self):
+        """Tests that dirty shards are written by threads of their own."""
+        for name in ("User", "Place", "Amenity"):
+            storage.classes()[name]()
+        threads = set()
+        barrier = threading.Barrier(3, timeout=5)
+
+        def record(path, fns, durability=None):
+            threads.add(threading.current_thread())
+            barrier.wait()
+        with patch.object(FileStorage, "_FileStorage__replace",
+                          side_effect=record):
+            storage.save()
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_delete_last(self):
+        """Tests that the shard of a class left empty is removed."""
+        fnu = storage.classes()["User"]()
+        storage.classes()["State"]()
+        storage.save()
+        storage.delete(fnu)
+        storage.save()
+        self.assertFalse(os.path.isfile(self.shard("User")))
+        self.assertEqual(list(self.reloaded()), [
+            fnk for fnk in storage.all() if fnk.startswith("State.")])
+
+    def test_save_error(self):
+        """Tests that a failed write leaves the shard dirty."""
+        fnu = storage.classes()["User"]()
+        with patch.object(FileStorage, "_FileStorage__replace",
+                          side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                storage.save()
+        storage.save()
+        self.assertIn("User." + fnu.id, self.reloaded())
+
+    def test_migrate(self):
+        """Tests splitting a single file into shards."""
+        FileStorage.sharded = False
+        for cls in storage.classes().values():
+            cls()
+        storage.save()
+        saved = {fnk: fno.to_dict() for fnk, fno in storage.all().items()}
+        FileStorage.sharded = True
+        self.assertEqual(self.reloaded(), saved)
+        storage.migrate()
+        self.assertFalse(os.path.isfile(
+            FileStorage._FileStorage__file_path))
+        self.assertEqual(len(os.listdir(self.tmpdir)),
+                         len(storage.classes()))
+        self.assertEqual(self.reloaded(), saved)
+
+    def test_save_migrates(self):
+        """Tests that a save does not lose the classes of a single file."""
+        FileStorage.sharded = False
+        fnu = storage.classes()["User"]()
+        storage.save()
+        FileStorage.sharded = True
+        self.reloaded()
+        fnp = storage.classes()["Place"]()
+        storage.save()
+        self.assertEqual(sorted(self.reloaded()),
+                         sorted(["User." + fnu.id, "Place." + fnp.id]))
+        self.assertFalse(os.path.isfile(
+            FileStorage._FileStorage__file_path))
+
+    def test_switch_modes(self):
+        """Tests that no object is lost switching the mode back and forth.
+        """
+        fnp = storage.classes()["Place"]()
+        storage.save()
+        FileStorage.sharded = False
+        self.assertEqual(list(self.reloaded()), ["Place." + fnp.id])
+        fnu = storage.classes()["User"]()
+        storage.save()
+        self.assertEqual(os.listdir(self.tmpdir), ["file.json"])
+        FileStorage.sharded = True
+        self.reloaded()
+        storage.classes()["State"]().save()
+        self.assertNotIn("file.json", os.listdir(self.tmpdir))
+        self.assertEqual(len(self.reloaded()), 3)
+        self.assertIn("Place." + fnp.id, storage.all())
+        self.assertIn("User." + fnu.id, storage.all())
+
+    def write(self, path, *objs):
+        """Writes objs to path as another process would."""
+        with open(path, "w", encoding="utf-8") as fnf:
+            json.dump({type(fno).__name__ + "." + fno.id: fno.to_dict()
+                       for fno in objs}, fnf)
+        for fno in objs:
+            storage.delete(fno)
+
+    def test_changed_since_read(self):
+        """Tests that files changed since read are not removed."""
+        storage.classes()["Place"]().save()
+        path = FileStorage._FileStorage__file_path
+        self.write(path, storage.classes()["User"]())
+        with self.assertRaises(ValueError):
+            storage.save()
+        self.assertTrue(os.path.isfile(path))
+        self.assertEqual(len(self.reloaded()), 2)
+        storage.save()
+        self.assertFalse(os.path.isfile(path))
+        FileStorage.sharded = False
+        self.write(self.shard("State"), storage.classes()["State"]())
+        with self.assertRaises(ValueError):
+            storage.save()
+        self.assertEqual(len(self.reloaded()), 3)
+        storage.save()
+        self.assertEqual(os.listdir(self.tmpdir), ["file.json"])
+        self.assertEqual(len(self.reloaded()), 3)
+
+    def test_migrate_mode(self):
+        """Tests that migrate() needs the sharded mode."""
+        FileStorage.sharded = False
+        with self.assertRaises(ValueError):
+            storage.migrate()
+
 
 if __name__ == '__main__':
     unittest.main()
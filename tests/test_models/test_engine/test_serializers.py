@@ -0,0 +1,157 @@
+#!/usr/bin/python3
+"""Unittest module for the serializers of FileStorage."""
+
+import unittest
+import os
+import pickle
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from models import storage
+from models.engine import serializers
+from models.engine.file_storage import FileStorage
+
+
+class TestSerializers(unittest.TestCase):
+    """Test Cases for the serializers module."""
+
+    def setUp(self):
+        """Points FileStorage at a temporary directory."""
+        self.path = FileStorage._FileStorage__file_path
+        self.tmpdir = tempfile.mkdtemp()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Tears down test methods."""
+        FileStorage.format = None
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__file_path = self.path
+        shutil.rmtree(self.tmpdir)
+
+    def use(self, name):
+        """Points FileStorage at name in the temporary directory."""
+        fnp = os.path.join(self.tmpdir, name)
+        FileStorage._FileStorage__file_path = fnp
+        return fnp
+
+    def populate(self):
+        """Creates a few objects and returns their records."""
+        classes = storage.classes()
+        fnp = classes["Place"]()
+        fnp.name = "Loft"
+        fnp.amenity_ids = ["wifi"]
+        fnr = classes["Review"]()
+        fnr.place_id = fnp.id
+        return {fnk: fno.to_dict() for fnk, fno in storage.all().items()}
+
+    def test_serializer_for(self):
+        """Tests picking a serializer by extension or name."""
+        self.assertEqual(serializers.serializer_for("a.json").name, "json")
+        self.assertEqual(serializers.serializer_for("a.PKL").name, "pickle")
+        self.assertEqual(serializers.serializer_for("a.pickle").name,
+                         "pickle")
+        self.assertEqual(serializers.serializer_for("a.db").name, "json")
+        self.assertEqual(serializers.serializer_for("a.db", "pickle").name,
+                         "pickle")
+        self.assertEqual(serializers.serializer_for("a.pkl", "pickle").name,
+                         "pickle")
+        with self.assertRaises(ValueError):
+            serializers.serializer_for("a.json", "pickle")
+        with self.assertRaisesRegex(ValueError, "msgpack.*json, pickle"):
+            serializers.serializer_for("a.db", "msgpack")
+
+    def test_pickle_round_trip(self):
+        """Tests saving and reloading a .pickle file."""
+        fnp = self.use("file.pickle")
+        records = self.populate()
+        storage.save()
+        with open(fnp, "rb") as fnf:
+            stored = pickle.load(fnf)
+        for fnv in stored.values():
+            self.assertIs(type(fnv["created_at"]), datetime)
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual({fnk: fno.to_dict()
+                          for fnk, fno in storage.all().items()}, records)
+
+    def test_format_setting(self):
+        """Tests that format applies to files of no known extension."""
+        fnp = self.use("file.db")
+        FileStorage.format = "pickle"
+        records = self.populate()
+        storage.save()
+        with open(fnp, "rb") as fnf:
+            self.assertEqual(len(pickle.load(fnf)), len(records))
+        FileStorage.format = None
+        with self.assertRaisesRegex(ValueError, "not a json file"):
+            storage.reload()
+        self.use("file.json")
+        FileStorage.format = "pickle"
+        with self.assertRaisesRegex(ValueError, "is a json file"):
+            storage.save()
+
+    def test_set_file_path(self):
+        """Tests the path set from the environment and its default."""
+        FileStorage.set_file_path()
+        self.assertEqual(FileStorage._FileStorage__file_path, "file.json")
+        FileStorage.format = "pickle"
+        FileStorage.set_file_path()
+        self.assertEqual(FileStorage._FileStorage__file_path, "file.pickle")
+        with self.assertRaises(ValueError):
+            FileStorage.set_file_path("file.json")
+        FileStorage.format = "msgpack"
+        with self.assertRaisesRegex(ValueError, "unknown format msgpack"):
+            FileStorage.set_file_path()
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+
+        def run(**env):
+            """returns the number of objects another process sees"""
+            fnp = subprocess.run(
+                [sys.executable, "-c", "from models import storage\n"
+                 "storage.classes()['User']().save()\n"
+                 "print(storage.count())"],
+                cwd=self.tmpdir, stdout=subprocess.PIPE, check=True,
+                env=dict(os.environ, PYTHONPATH=root, **env))
+            return int(fnp.stdout)
+        self.assertEqual(run(HBNB_STORAGE_FORMAT="pickle"), 1)
+        self.assertEqual(run(), 1)
+        self.assertEqual(run(HBNB_STORAGE_PATH="file.pickle"), 2)
+        self.assertEqual(sorted(os.listdir(self.tmpdir)),
+                         ["file.json", "file.pickle"])
+
+    def test_convert(self):
+        """Tests converting JSON to pickle and back."""
+        source = self.use("file.json")
+        records = self.populate()
+        storage.save()
+        serializers.convert(source, os.path.join(self.tmpdir, "file.pkl"))
+        serializers.convert(os.path.join(self.tmpdir, "file.pkl"),
+                            os.path.join(self.tmpdir, "back.json"))
+        with open(os.path.join(self.tmpdir, "back.json"),
+                  "r", encoding="utf-8") as fnf:
+            self.assertEqual(json.load(fnf), records)
+
+    def test_convert_cli(self):
+        """Tests the converter command line."""
+        source = self.use("file.json")
+        records = self.populate()
+        storage.save()
+        target = os.path.join(self.tmpdir, "file.pickle")
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))))
+        fnp = subprocess.run(
+            [sys.executable, "-m", "models.engine.serializers",
+             source, target], cwd=self.tmpdir,
+            env=dict(os.environ, PYTHONPATH=root))
+        self.assertEqual(fnp.returncode, 0)
+        self.use("file.pickle")
+        storage.reload()
+        self.assertEqual(sorted(storage.all()), sorted(records))
+
+
+if __name__ == "__main__":
+    unittest.main()